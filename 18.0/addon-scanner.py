@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# Single-process change detection for the addon watcher.
+#
+# Walks every module of the given addon directories once, hashes the source
+# files (manifest, Python, XML, JS, styles, data) and compares them with the
+# per-file state of the previous run. Files whose mtime and size did not move
+# are not read again. Prints the modules whose content changed. With
+# --pending-state-file the new state is written to that file instead, for the
+# caller to move it over the state file once the changes are upgraded.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+MANIFEST_NAMES = ('__manifest__.py', '__openerp__.py')
+SOURCE_EXTENSIONS = ('.py', '.xml', '.js', '.css', '.scss', '.csv', '.yml', '.yaml')
+SKIPPED_DIRS = ('__pycache__', 'node_modules')
+STATE_VERSION = 2
+
+
+def discover_modules(roots):
+    modules = {}
+    for root in roots:
+        try:
+            entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.') or entry.name in SKIPPED_DIRS or not entry.is_dir():
+                continue
+            if any(os.path.isfile(os.path.join(entry.path, name)) for name in MANIFEST_NAMES):
+                # the first addons path wins, as in Odoo
+                modules.setdefault(entry.name, entry.path)
+    return modules
+
+
+def iter_source_files(module_path):
+    for dirpath, dirnames, filenames in os.walk(module_path):
+        dirnames[:] = [name for name in dirnames if not name.startswith('.') and name not in SKIPPED_DIRS]
+        for filename in filenames:
+            if filename.endswith(SOURCE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as stream:
+        for chunk in iter(lambda: stream.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_state(path):
+    try:
+        with open(path) as stream:
+            state = json.load(stream)
+    except (OSError, ValueError):
+        return {}
+    # states of the former shell implementation carry no per-file data
+    if not isinstance(state, dict) or state.get('version') != STATE_VERSION:
+        return {}
+    return state.get('modules', {})
+
+
+def save_state(path, modules):
+    tmp_path = '%s.%s.tmp' % (path, os.getpid())
+    with open(tmp_path, 'w') as stream:
+        json.dump({'version': STATE_VERSION, 'modules': modules}, stream)
+    os.replace(tmp_path, path)
+
+
+def scan(roots, previous):
+    """ Return ``(current state, {module: changed relative paths}, stats)``. """
+    current = {}
+    changes = {}
+    stats = {'modules': 0, 'files': 0, 'hashed': 0}
+    for module, module_path in discover_modules(roots).items():
+        stats['modules'] += 1
+        previous_module = previous.get(module) or {}
+        previous_files = previous_module.get('files', {}) if previous_module.get('path') == module_path else {}
+        files = {}
+        changed = []
+        for path in iter_source_files(module_path):
+            relative = os.path.relpath(path, module_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats['files'] += 1
+            known = previous_files.get(relative)
+            if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+                digest = known[2]
+            else:
+                digest = hash_file(path)
+                stats['hashed'] += 1
+            files[relative] = [stat.st_mtime_ns, stat.st_size, digest]
+            if not known or known[2] != digest:
+                changed.append(relative)
+        changed += [relative for relative in previous_files if relative not in files]
+        if not previous_module or changed:
+            changes[module] = sorted(changed)
+        current[module] = {'path': module_path, 'files': files}
+    return current, changes, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect changed Odoo modules by content hash")
+    parser.add_argument('roots', nargs='+', help="addon directories to scan")
+    parser.add_argument('--state-file', default='/tmp/addon-states.json')
+    parser.add_argument('--json', action='store_true', help="print {module: {path, changed files}} as JSON")
+    parser.add_argument('--status', action='store_true', help="list the modules without updating the state")
+    parser.add_argument('--dry-run', action='store_true', help="do not update the state file")
+    parser.add_argument('--pending-state-file',
+                        help="write the new state to this file instead of the state file")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    previous = load_state(args.state_file)
+    current, changes, stats = scan(args.roots, previous)
+    duration = time.monotonic() - start
+
+    if args.status:
+        for module, data in sorted(current.items()):
+            print("%s\t%s\t%s files\t%s" % (
+                module, data['path'], len(data['files']), 'changed' if module in changes else 'unchanged'))
+        return 0
+
+    if not args.dry_run:
+        save_state(args.pending_state_file or args.state_file, current)
+    if args.json:
+        json.dump({
+            module: {'path': current[module]['path'], 'changed': files}
+            for module, files in sorted(changes.items())
+        }, sys.stdout)
+        print()
+    else:
+        for module in sorted(changes):
+            print(module)
+    print("Scanned %(modules)s modules, %(files)s files (%(hashed)s hashed)" % stats
+          + " in %.2fs" % duration, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
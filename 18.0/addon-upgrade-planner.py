@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# Dependency-aware upgrade planner for the addon watcher.
+#
+# Reads the manifests of the watched addon directories, drops the changed
+# modules that do not need a registry reload (only static assets changed),
+# and upgrades the rest with a single ordered `odoo -u` run. The run holds an
+# flock on the lock file, which the kernel releases if the process dies, and
+# reports the load time of every module Odoo logs.
+import argparse
+import ast
+import errno
+import fcntl
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+MANIFEST_NAMES = ('__manifest__.py', '__openerp__.py')
+MODULE_LOADED_RE = re.compile(r"Module (\S+) loaded in ([\d.]+)s")
+EXIT_LOCKED = 75
+
+
+def log(message):
+    print("%s [planner] %s" % (time.strftime('%Y-%m-%d %H:%M:%S'), message), flush=True)
+
+
+def read_manifests(roots):
+    manifests = {}
+    for root in roots:
+        try:
+            entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name in manifests or not entry.is_dir():
+                continue
+            for name in MANIFEST_NAMES:
+                path = os.path.join(entry.path, name)
+                if os.path.isfile(path):
+                    try:
+                        with open(path) as stream:
+                            manifests[entry.name] = ast.literal_eval(stream.read())
+                    except (OSError, SyntaxError, ValueError) as e:
+                        log("Cannot parse %s: %s" % (path, e))
+                        manifests[entry.name] = {}
+                    break
+    return manifests
+
+
+def needs_update(changed_files):
+    # assets are served from the files themselves, anything else needs -u;
+    # an empty list means a new module or one whose files were only removed
+    return not changed_files or any(not path.startswith('static' + os.sep) for path in changed_files)
+
+
+def topological_order(modules, manifests):
+    """ Order ``modules`` so that every module comes after its local dependencies. """
+    ordered = []
+    visiting = set()
+    done = set()
+
+    def visit(module):
+        if module in done or module in visiting:
+            return
+        visiting.add(module)
+        for dependency in manifests.get(module, {}).get('depends', []):
+            if dependency in manifests:
+                visit(dependency)
+        visiting.discard(module)
+        done.add(module)
+        if module in modules:
+            ordered.append(module)
+
+    for module in sorted(modules):
+        visit(module)
+    return ordered
+
+
+def plan(changes, manifests):
+    selected = {module for module, files in changes.items() if needs_update(files)}
+    skipped = sorted(set(changes) - selected)
+    return topological_order(selected, manifests), skipped
+
+
+def acquire_lock(path):
+    handle = open(path, 'a+')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError as e:
+        if e.errno in (errno.EAGAIN, errno.EACCES):
+            handle.close()
+            return None
+        raise
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    return handle
+
+
+def run_upgrade(args, modules):
+    command = [args.python, args.odoo_bin, '-c', args.config, '-d', args.database,
+               '-u', ','.join(modules), '--stop-after-init', '--log-level=info']
+    log("Executing: %s" % ' '.join(command))
+    timings = {}
+    start = time.monotonic()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               start_new_session=True)
+
+    def on_timeout(signum, frame):
+        log("Upgrade exceeded %ss, stopping it" % args.timeout)
+        os.killpg(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGALRM, on_timeout)
+    signal.alarm(args.timeout)
+    try:
+        for line in process.stdout:
+            sys.stdout.write(line)
+            match = MODULE_LOADED_RE.search(line)
+            if match and match.group(1) in modules:
+                timings[match.group(1)] = float(match.group(2))
+        returncode = process.wait()
+    finally:
+        signal.alarm(0)
+    duration = time.monotonic() - start
+    for module in modules:
+        if module in timings:
+            log("  %s: %.2fs" % (module, timings[module]))
+    log("Upgrade of %s modules finished in %.2fs with exit code %s" % (len(modules), duration, returncode))
+    return returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and run the upgrade of changed Odoo modules")
+    parser.add_argument('roots', nargs='+', help="addon directories holding the watched modules")
+    parser.add_argument('--changes-json', help="scanner output: {module: {changed: [files]}}, '-' for stdin")
+    parser.add_argument('--modules', nargs='*', default=[], help="modules to upgrade unconditionally")
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--config', default='/etc/odoo/odoo.conf')
+    parser.add_argument('--odoo-bin', default='/usr/bin/odoo')
+    parser.add_argument('--python', default='/usr/bin/python3')
+    parser.add_argument('--lock-file', default='/tmp/addon-upgrade.lock')
+    parser.add_argument('--timeout', type=int, default=1800)
+    parser.add_argument('--dry-run', action='store_true', help="only print the plan")
+    args = parser.parse_args()
+
+    changes = {module: [] for module in args.modules}
+    if args.changes_json:
+        if args.changes_json == '-':
+            scanned = json.load(sys.stdin)
+        else:
+            with open(args.changes_json) as stream:
+                scanned = json.load(stream)
+        for module, data in scanned.items():
+            changes.setdefault(module, data.get('changed', []))
+
+    manifests = read_manifests(args.roots)
+    modules, skipped = plan(changes, manifests)
+    if skipped:
+        log("Static-only changes, no upgrade needed: %s" % ', '.join(skipped))
+    if not modules:
+        log("No modules need an upgrade")
+        return 0
+    log("Upgrade plan: %s" % ', '.join(modules))
+    if args.dry_run:
+        return 0
+
+    lock = acquire_lock(args.lock_file)
+    if lock is None:
+        log("Another upgrade holds %s, skipping" % args.lock_file)
+        return EXIT_LOCKED
+    with lock:
+        return run_upgrade(args, modules)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,6 +14,9 @@ ODOO_CONFIG="/etc/odoo/odoo.conf"
 ODOO_BIN="/usr/bin/odoo"
 PYTHON_BIN="/usr/bin/python3"
 STATE_FILE="/tmp/addon-states.json"
+ADDON_SCANNER="/scripts/addon-scanner.py"
+UPGRADE_PLANNER="/scripts/addon-upgrade-planner.py"
+UPGRADE_TIMEOUT="${ADDON_UPGRADE_TIMEOUT:-1800}"
 UPGRADE_LOCK="/tmp/addon-upgrade.lock"
 
 # Colors for output
@@ -100,162 +103,94 @@ discover_addon_directories() {
     log_info "Total addon directories to watch: ${#WATCH_DIRS[@]}"
 }
 
-# Function to scan addon directories and detect modules
-scan_addons() {
-    local addon_dir="$1"
-    local modules=()
-
-    if [ ! -d "$addon_dir" ]; then
-        return
-    fi
-
-    # Find all directories containing __manifest__.py or __openerp__.py
-    while IFS= read -r -d '' manifest_file; do
-        local module_dir=$(dirname "$manifest_file")
-        local module_name=$(basename "$module_dir")
-
-        # Skip hidden directories and common non-addon directories
-        if [[ "$module_name" != .* && "$module_name" != "__pycache__" ]]; then
-            modules+=("$module_name")
-        fi
-    done < <(find "$addon_dir" -maxdepth 2 -name "__manifest__.py" -o -name "__openerp__.py" -print0 2>/dev/null)
-
-    printf '%s\n' "${modules[@]}"
-}
-
-# Function to get directory modification time and file count
-get_dir_state() {
-    local dir="$1"
-    if [ ! -d "$dir" ]; then
-        echo "not_exists"
-        return
-    fi
-
-    # Get modification time and file count as state
-    local mod_time=$(find "$dir" -type f \( -name "*.py" -o -name "*.xml" -o -name "*.js" -o -name "*.css" -o -name "*.yml" \) -exec stat -f "%m" {} \; 2>/dev/null | sort -n | tail -1)
-    local file_count=$(find "$dir" -type f \( -name "*.py" -o -name "*.xml" -o -name "*.js" -o -name "*.css" -o -name "*.yml" \) | wc -l | tr -d ' ')
-
-    echo "${mod_time:-0}_${file_count:-0}"
-}
+# Function to run the upgrade planner
+# Usage: run_upgrade_planner [planner options...]
+run_upgrade_planner() {
+    local db_name=$(get_database_name)
+    local status=0
 
-# Function to load previous states
-load_states() {
-    if [ -f "$STATE_FILE" ]; then
-        cat "$STATE_FILE"
-    else
-        echo "{}"
-    fi
-}
+    log_info "Database: $db_name"
 
-# Function to save states
-save_states() {
-    local states="$1"
-    echo "$states" > "$STATE_FILE"
+    # The planner skips static-only changes, orders modules by their manifest
+    # dependencies and runs one upgrade under an flock on $UPGRADE_LOCK
+    "$PYTHON_BIN" "$UPGRADE_PLANNER" "${WATCH_DIRS[@]}" "$@" \
+        --database "$db_name" \
+        --config "$ODOO_CONFIG" \
+        --odoo-bin "$ODOO_BIN" \
+        --python "$PYTHON_BIN" \
+        --lock-file "$UPGRADE_LOCK" \
+        --timeout "$UPGRADE_TIMEOUT" >> "$LOG_FILE" 2>&1 || status=$?
+
+    case "$status" in
+        0)
+            log_success "Upgrade plan completed"
+            ;;
+        75)
+            log_warn "Another upgrade process is running, skipping..."
+            ;;
+        *)
+            log_error "Upgrade failed (exit code $status)"
+            log_error "Check $LOG_FILE for detailed error information"
+            ;;
+    esac
+    return $status
 }
 
 # Function to upgrade specific modules
 upgrade_modules() {
     local modules=("$@")
-    local db_name=$(get_database_name)
 
     if [ ${#modules[@]} -eq 0 ]; then
         log_info "No modules to upgrade"
         return
     fi
 
-    # Create upgrade lock
-    if [ -f "$UPGRADE_LOCK" ]; then
-        log_warn "Another upgrade process is running, skipping..."
-        return
+    if [ ${#WATCH_DIRS[@]} -eq 0 ]; then
+        discover_addon_directories
     fi
 
-    echo $$ > "$UPGRADE_LOCK"
-
     log_info "Starting upgrade for modules: ${modules[*]}"
-    log_info "Database: $db_name"
-
-    # Join modules with comma
-    local module_list=$(IFS=','; echo "${modules[*]}")
-
-    # Construct the upgrade command
-    local upgrade_cmd="$PYTHON_BIN $ODOO_BIN -c $ODOO_CONFIG -u $module_list -d $db_name --stop-after-init"
-
-    log_info "Executing: $upgrade_cmd"
-
-    # Execute the upgrade command with proper error handling
-    if timeout 300 $upgrade_cmd >> "$LOG_FILE" 2>&1; then
-        log_success "Successfully upgraded modules: ${modules[*]}"
-    else
-        log_error "Failed to upgrade modules: ${modules[*]}"
-        log_error "Check $LOG_FILE for detailed error information"
-    fi
-
-    # Remove upgrade lock
-    rm -f "$UPGRADE_LOCK"
+    run_upgrade_planner --modules "${modules[@]}" || true
 }
 
 # Function to detect and upgrade changed modules
 detect_and_upgrade_changes() {
-    local current_states="{}"
-    local previous_states=$(load_states)
-    local changed_modules=()
+    local changes_file
+    local pending_state="$STATE_FILE.pending"
 
     log_info "Scanning addon directories for changes..."
 
     # First discover all addon directories
     discover_addon_directories
 
-    # Build current states
-    for watch_dir in "${WATCH_DIRS[@]}"; do
-        if [ -d "$watch_dir" ]; then
-            log_info "Scanning directory: $watch_dir"
-
-            local modules=($(scan_addons "$watch_dir"))
-
-            for module in "${modules[@]}"; do
-                local module_path="$watch_dir/$module"
-                local current_state=$(get_dir_state "$module_path")
-
-                # Update current states JSON (simplified approach)
-                current_states=$(echo "$current_states" | python3 -c "
-import sys, json
-states = json.load(sys.stdin)
-states['$module'] = '$current_state'
-json.dump(states, sys.stdout)
-" 2>/dev/null || echo "{\"$module\": \"$current_state\"}")
-
-                # Check if module state changed
-                local previous_state=$(echo "$previous_states" | python3 -c "
-import sys, json
-try:
-    states = json.load(sys.stdin)
-    print(states.get('$module', 'new'))
-except:
-    print('new')
-" 2>/dev/null || echo "new")
-
-                if [ "$current_state" != "$previous_state" ]; then
-                    log_info "Detected changes in module: $module"
-                    log_info "  Previous state: $previous_state"
-                    log_info "  Current state: $current_state"
-                    changed_modules+=("$module")
-                fi
-            done
-        else
-            log_warn "Watch directory does not exist: $watch_dir"
-        fi
-    done
+    if [ ${#WATCH_DIRS[@]} -eq 0 ]; then
+        log_info "No changed modules detected"
+        return
+    fi
 
-    # Save current states
-    save_states "$current_states"
+    # Hash all addon sources in a single process; it reports the changed files per module.
+    # The new state replaces $STATE_FILE only once the changes are upgraded, so a
+    # failed or skipped upgrade reports the same modules on the next scan.
+    changes_file=$(mktemp /tmp/addon-changes.XXXXXX)
+    if ! "$PYTHON_BIN" "$ADDON_SCANNER" --json --state-file "$STATE_FILE" \
+            --pending-state-file "$pending_state" "${WATCH_DIRS[@]}" > "$changes_file" 2>> "$LOG_FILE"; then
+        log_error "Addon scan failed, check $LOG_FILE"
+        rm -f "$changes_file" "$pending_state"
+        return
+    fi
 
-    # Upgrade changed modules if any
-    if [ ${#changed_modules[@]} -gt 0 ]; then
-        log_info "Found ${#changed_modules[@]} changed modules: ${changed_modules[*]}"
-        upgrade_modules "${changed_modules[@]}"
-    else
+    if [ "$(tr -d '[:space:]' < "$changes_file")" = "{}" ]; then
         log_info "No changed modules detected"
+        mv -f "$pending_state" "$STATE_FILE"
+    else
+        log_info "Detected changes: $(cat "$changes_file")"
+        if run_upgrade_planner --changes-json "$changes_file"; then
+            mv -f "$pending_state" "$STATE_FILE"
+        else
+            rm -f "$pending_state"
+        fi
     fi
+    rm -f "$changes_file"
 }
 
 # Function to run initial scan and setup
@@ -319,23 +254,14 @@ show_status() {
     # Discover addon directories first
     discover_addon_directories
 
-    for watch_dir in "${WATCH_DIRS[@]}"; do
-        if [ -d "$watch_dir" ]; then
-            echo -e "\n${BLUE}Directory: $watch_dir${NC}"
-            local modules=($(scan_addons "$watch_dir"))
-
-            if [ ${#modules[@]} -eq 0 ]; then
-                echo "  No addons found"
-            else
-                for module in "${modules[@]}"; do
-                    local module_path="$watch_dir/$module"
-                    local state=$(get_dir_state "$module_path")
-                    echo -e "  ${GREEN}✓${NC} $module (state: $state)"
-                done
-            fi
-        else
-            echo -e "\n${RED}Directory not found: $watch_dir${NC}"
-        fi
+    if [ ${#WATCH_DIRS[@]} -eq 0 ]; then
+        echo "  No addons found"
+        return
+    fi
+
+    "$PYTHON_BIN" "$ADDON_SCANNER" --status --state-file "$STATE_FILE" "${WATCH_DIRS[@]}" 2>/dev/null |
+    while IFS=$'\t' read -r module path files state; do
+        echo -e "  ${GREEN}✓${NC} $module ($path, $files, $state)"
     done
 }
 
@@ -9,5 +9,7 @@
     "author": "Tayssir Werfelli",
     "website": "",
     "depends": ["sale", "crm"],
-    "data": [ ],
+    "data": [
+        "data/ir_cron_data.xml",
+    ],
 }
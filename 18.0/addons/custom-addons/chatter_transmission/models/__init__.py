@@ -1 +1,2 @@
-from . import sale_order
\ No newline at end of file
+from . import ir_attachment
+from . import sale_order
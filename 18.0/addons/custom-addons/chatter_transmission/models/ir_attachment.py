@@ -0,0 +1,118 @@
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# storage columns ir.attachment.create() drops from its values
+STORAGE_FIELDS = ['store_fname', 'checksum', 'file_size']
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    linked_attachment_id = fields.Many2one(
+        'ir.attachment', string="Linked Attachment", index='btree_not_null', ondelete='restrict',
+        help="Attachment whose content is read until this one is edited.")
+
+    @api.depends('linked_attachment_id')
+    def _compute_raw(self):
+        super()._compute_raw()
+        for attachment in self:
+            if attachment.linked_attachment_id and not attachment.store_fname and not attachment.db_datas:
+                attachment.raw = attachment.linked_attachment_id.sudo().raw
+
+    def write(self, vals):
+        if 'raw' in vals or 'datas' in vals:
+            # the edited attachment gets its own content from now on
+            vals = dict(vals, linked_attachment_id=False)
+        return super().write(vals)
+
+    def unlink(self):
+        linked = self.sudo().search([
+            ('linked_attachment_id', 'in', self.ids),
+            ('id', 'not in', self.ids),
+        ])
+        linked._materialize()
+        return super().unlink()
+
+    def _materialize(self):
+        for attachment in self:
+            attachment.write({'raw': attachment.raw})
+
+    def _prepare_shared_copy_values(self, res_model, res_id):
+        """ Values to copy the attachments onto another document without
+        duplicating their content. Filestore attachments point to the same
+        checksum file: the filestore garbage collector only drops files that no
+        row references anymore, so either side can be deleted or edited safely.
+        Database-stored attachments are linked to their source and only get
+        their own content once edited, or when the source is deleted.
+        """
+        vals_list = []
+        for attachment in self:
+            vals = {
+                'name': attachment.name,
+                'description': attachment.description,
+                'type': attachment.type,
+                'mimetype': attachment.mimetype,
+                'res_model': res_model,
+                'res_id': res_id,
+            }
+            if attachment.type == 'url':
+                vals['url'] = attachment.url
+            elif attachment.store_fname:
+                vals.update({
+                    'store_fname': attachment.store_fname,
+                    'checksum': attachment.checksum,
+                    'file_size': attachment.file_size,
+                    'index_content': attachment.index_content,
+                })
+            else:
+                vals.update({
+                    'linked_attachment_id': attachment.linked_attachment_id.id or attachment.id,
+                    'checksum': attachment.checksum,
+                    'file_size': attachment.file_size,
+                    'index_content': attachment.index_content,
+                })
+            vals_list.append(vals)
+        return vals_list
+
+    @api.model
+    def _create_shared_copies(self, vals_list):
+        """ Create attachments from _prepare_shared_copy_values() values.
+        create() drops the storage columns, they are set afterwards with one
+        UPDATE for the whole batch.
+        """
+        vals_list = [dict(vals) for vals in vals_list]
+        storage = [[vals.pop(fname, None) for fname in STORAGE_FIELDS] for vals in vals_list]
+        attachments = self.create(vals_list)
+        rows = [(attachment.id, *values) for attachment, values in zip(attachments, storage) if any(values)]
+        if rows:
+            self.flush_model(STORAGE_FIELDS)
+            self.env.cr.execute(SQL(
+                """
+                UPDATE ir_attachment AS att
+                   SET store_fname = v.store_fname, checksum = v.checksum, file_size = v.file_size
+                  FROM (VALUES %s) AS v(id, store_fname, checksum, file_size)
+                 WHERE att.id = v.id
+                """,
+                SQL(", ").join(SQL("(%s, %s::varchar, %s::varchar, %s::int)", *row) for row in rows),
+            ))
+            attachments.invalidate_recordset(STORAGE_FIELDS + ['raw', 'datas'])
+        return attachments
+
+    @api.model
+    def _shared_storage_savings(self, domain=None):
+        """ Bytes not written thanks to shared content: every attachment past the
+        first one on a filestore file, plus every linked attachment.
+        """
+        attachments = self.sudo().search(domain or [])
+        self.flush_model(['store_fname', 'file_size', 'linked_attachment_id'])
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(att.file_size), 0)
+              FROM ir_attachment att
+             WHERE att.id = ANY(%(ids)s)
+               AND (att.linked_attachment_id IS NOT NULL
+                    OR EXISTS (SELECT 1
+                                 FROM ir_attachment other
+                                WHERE other.store_fname = att.store_fname
+                                  AND other.id < att.id))
+        """, {'ids': attachments.ids})
+        return self.env.cr.fetchone()[0]
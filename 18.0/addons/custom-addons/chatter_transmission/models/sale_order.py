@@ -1,34 +1,125 @@
-from odoo import models, api
+from collections import defaultdict
+
+from odoo import models, api, fields, Command
+from odoo.tools.sql import column_exists, create_column
+
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
 
-    def create(self, vals):
-        order = super().create(vals)
-        order._sync_chatter_from_crm()
-        return order
-
-    def _sync_chatter_from_crm(self):
-
-        for order in self:
-            lead = order.opportunity_id
-            if not lead:
-                continue
-
-            messages = lead.message_ids.sorted(key=lambda msg: msg.date)
-
-            for message in messages:
-                if message.message_type == 'notification':
-                    continue
-                new_msg = order.message_post(
-                    body=message.body,
-                    author_id=message.author_id.id if message.author_id else False,
-                    message_type=message.message_type,
-                    subtype_id=message.subtype_id.id if message.subtype_id else None
-                )
-                print ('=============',message)
-                for attachment in message.attachment_ids:
-                    attachment.copy({
-                        'res_model': 'sale.order',
-                        'res_id': order.id,
-                    })
+    chatter_sync_message_id = fields.Integer(
+        string="Last Transferred Lead Message", copy=False,
+        help="Id of the last lead message transferred to this order, later ones are transferred by the sync cron.")
+
+    def _auto_init(self):
+        # when the watermark is added, orders that exist already start at their
+        # lead's last message
+        if not column_exists(self.env.cr, 'sale_order', 'chatter_sync_message_id'):
+            create_column(self.env.cr, 'sale_order', 'chatter_sync_message_id', 'int4')
+            self.env.cr.execute("""
+                UPDATE sale_order so
+                   SET chatter_sync_message_id = msg.last_id
+                  FROM (SELECT res_id, MAX(id) AS last_id
+                          FROM mail_message
+                         WHERE model = 'crm.lead'
+                      GROUP BY res_id) msg
+                 WHERE msg.res_id = so.opportunity_id
+            """)
+        return super()._auto_init()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        orders = super().create(vals_list)
+        if orders.filtered('opportunity_id'):
+            self.env.ref('chatter_transmission.ir_cron_sync_chatter_from_crm')._trigger()
+        return orders
+
+    @api.model
+    def _get_chatter_sync_order_ids(self, limit=None):
+        # open quotations whose lead got messages past the watermark
+        self.env['sale.order'].flush_model(['opportunity_id', 'state', 'chatter_sync_message_id'])
+        self.env['mail.message'].flush_model(['model', 'res_id', 'message_type'])
+        self.env.cr.execute("""
+            SELECT so.id
+              FROM sale_order so
+             WHERE so.opportunity_id IS NOT NULL
+               AND so.state IN ('draft', 'sent')
+               AND EXISTS (SELECT 1
+                             FROM mail_message msg
+                            WHERE msg.model = 'crm.lead'
+                              AND msg.res_id = so.opportunity_id
+                              AND msg.id > COALESCE(so.chatter_sync_message_id, 0)
+                              AND msg.message_type != 'notification')
+          ORDER BY so.id
+             LIMIT %s
+        """, [limit])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _cron_sync_chatter_from_crm(self, batch_size=50, message_limit=500):
+        orders = self.browse(self._get_chatter_sync_order_ids(limit=batch_size))
+        orders._sync_chatter_from_crm(message_limit=message_limit)
+        self.env['ir.cron']._notify_progress(
+            done=len(orders),
+            remaining=len(self._get_chatter_sync_order_ids()),
+        )
+
+    def _sync_chatter_from_crm(self, message_limit=None):
+        """ Transfer the lead messages posted after each order's watermark, at
+        most ``message_limit`` per order, and move the watermark along. Running
+        it again only picks up what is new, so it is safe to repeat.
+        """
+        orders = self.filtered('opportunity_id')
+        if not orders:
+            return
+        self.flush_recordset(['opportunity_id', 'chatter_sync_message_id'])
+        self.env.cr.execute("""
+            SELECT so.id, msg.id
+              FROM sale_order so
+        CROSS JOIN LATERAL (SELECT id
+                              FROM mail_message
+                             WHERE model = 'crm.lead'
+                               AND res_id = so.opportunity_id
+                               AND id > COALESCE(so.chatter_sync_message_id, 0)
+                               AND message_type != 'notification'
+                          ORDER BY id
+                             LIMIT %s) msg
+             WHERE so.id = ANY(%s)
+          ORDER BY so.id, msg.id
+        """, [message_limit, orders.ids])
+        message_ids_by_order = defaultdict(list)
+        for order_id, message_id in self.env.cr.fetchall():
+            message_ids_by_order[order_id].append(message_id)
+        messages = self.env['mail.message'].sudo().browse(
+            {message_id for message_ids in message_ids_by_order.values() for message_id in message_ids})
+
+        transfers = [
+            (order, message)
+            for order in orders
+            for message in messages.browse(message_ids_by_order[order.id])
+        ]
+        attachment_vals = []
+        for order, message in transfers:
+            attachment_vals += message.attachment_ids._prepare_shared_copy_values('sale.order', order.id)
+        attachment_ids = iter(self.env['ir.attachment'].sudo()._create_shared_copies(attachment_vals).ids)
+
+        vals_list = []
+        for order, message in transfers:
+            vals_list.append({
+                'model': 'sale.order',
+                'res_id': order.id,
+                'body': message.body,
+                'subject': message.subject,
+                'date': message.date,
+                'author_id': message.author_id.id,
+                'email_from': message.email_from,
+                'message_type': message.message_type,
+                'subtype_id': message.subtype_id.id,
+                'attachment_ids': [Command.set([next(attachment_ids) for _attachment in message.attachment_ids])],
+            })
+        # plain create: the transferred history notifies nobody
+        self.env['mail.message'].sudo().create(vals_list)
+
+        for order in orders:
+            if message_ids_by_order[order.id]:
+                order.chatter_sync_message_id = message_ids_by_order[order.id][-1]
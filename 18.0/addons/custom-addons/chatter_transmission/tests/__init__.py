@@ -0,0 +1,2 @@
+from . import test_attachment_sharing
+from . import test_chatter_sync
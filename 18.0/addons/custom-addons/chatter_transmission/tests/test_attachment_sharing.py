@@ -0,0 +1,86 @@
+import logging
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install', '-standard', 'chatter_benchmark')
+class TestAttachmentSharing(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': "Lead customer"})
+        cls.lead = cls.env['crm.lead'].create({'name': "Document heavy lead", 'partner_id': cls.partner.id})
+        pdf = b"%PDF-1.4\n" + b"0" * 50000
+        cls.attachments = cls.env['ir.attachment'].create([{
+            'name': "document_%03d.pdf" % index,
+            'raw': pdf + str(index).encode(),
+            'res_model': 'crm.lead',
+            'res_id': cls.lead.id,
+        } for index in range(200)])
+        cls.lead.message_post(body="Documents", attachment_ids=cls.attachments.ids)
+
+    def _transfer(self):
+        order = self.env['sale.order'].create({
+            'partner_id': self.partner.id,
+            'opportunity_id': self.lead.id,
+        })
+        order._sync_chatter_from_crm()
+        self.assertEqual(
+            order.chatter_sync_message_id,
+            max(self.lead.message_ids.filtered(lambda message: message.message_type != 'notification').ids),
+        )
+        return self.env['ir.attachment'].search([('res_model', '=', 'sale.order'), ('res_id', '=', order.id)])
+
+    def test_filestore_attachments_are_shared(self):
+        copies = self._transfer()
+        self.assertEqual(len(copies), 200)
+        self.assertEqual(set(copies.mapped('store_fname')), set(self.attachments.mapped('store_fname')))
+        sources = {attachment.name: attachment for attachment in self.attachments}
+        for copy in copies:
+            source = sources[copy.name]
+            self.assertEqual(copy.raw, source.raw)
+            self.assertEqual(copy.datas, source.datas)
+            self.assertEqual((copy.checksum, copy.file_size), (source.checksum, len(source.raw)))
+
+        saved = self.env['ir.attachment']._shared_storage_savings([('id', 'in', copies.ids)])
+        _logger.info("chatter transfer of 200 PDFs: %s filestore bytes saved", saved)
+        self.assertEqual(saved, sum(len(attachment.raw) for attachment in self.attachments))
+
+        # deleting the lead documents keeps the shared files for the quotation
+        self.attachments.unlink()
+        self.assertTrue(all(copies.mapped('raw')))
+
+    def test_database_attachments_are_linked(self):
+        self.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'db')
+        source = self.env['ir.attachment'].create({
+            'name': "inline.pdf",
+            'raw': b"%PDF-1.4 inline",
+            'res_model': 'crm.lead',
+            'res_id': self.lead.id,
+        })
+        vals = source._prepare_shared_copy_values('res.partner', self.partner.id)
+        linked = self.env['ir.attachment']._create_shared_copies(vals)
+        self.assertEqual(linked.linked_attachment_id, source)
+        self.assertFalse(linked.db_datas)
+        self.assertEqual(linked.raw, b"%PDF-1.4 inline")
+        self.assertEqual(linked.datas, source.datas)
+        self.assertEqual((linked.checksum, linked.file_size), (source.checksum, len(b"%PDF-1.4 inline")))
+        self.assertEqual(
+            self.env['ir.attachment']._shared_storage_savings([('id', '=', linked.id)]),
+            len(b"%PDF-1.4 inline"),
+        )
+
+        # editing materialises the linked attachment
+        linked.write({'raw': b"%PDF-1.4 edited"})
+        self.assertFalse(linked.linked_attachment_id)
+        self.assertEqual(source.raw, b"%PDF-1.4 inline")
+
+        # deleting the source materialises what still links to it
+        other = self.env['ir.attachment']._create_shared_copies(
+            source._prepare_shared_copy_values('res.partner', self.partner.id))
+        source.unlink()
+        self.assertFalse(other.linked_attachment_id)
+        self.assertEqual(other.raw, b"%PDF-1.4 inline")
@@ -0,0 +1,51 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestChatterSync(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.partner = cls.env['res.partner'].create({'name': "Lead customer"})
+        cls.lead = cls.env['crm.lead'].create({'name': "Lead", 'partner_id': cls.partner.id})
+        for index in range(3):
+            cls.lead.message_post(body="Message %s" % index, message_type='comment')
+        cls.order = cls.env['sale.order'].create({
+            'partner_id': cls.partner.id,
+            'opportunity_id': cls.lead.id,
+        })
+
+    def _transferred_bodies(self):
+        messages = self.env['mail.message'].search([
+            ('model', '=', 'sale.order'),
+            ('res_id', '=', self.order.id),
+            ('message_type', '=', 'comment'),
+        ], order='id')
+        return [str(message.body) for message in messages]
+
+    def test_sync_is_incremental_and_idempotent(self):
+        self.assertIn(self.order.id, self.env['sale.order']._get_chatter_sync_order_ids())
+        self.order._sync_chatter_from_crm(message_limit=2)
+        self.assertEqual(len(self._transferred_bodies()), 2)
+
+        self.order._sync_chatter_from_crm(message_limit=2)
+        self.assertEqual(len(self._transferred_bodies()), 3)
+        self.assertNotIn(self.order.id, self.env['sale.order']._get_chatter_sync_order_ids())
+
+        # nothing new: running again transfers nothing
+        self.order._sync_chatter_from_crm()
+        self.assertEqual(len(self._transferred_bodies()), 3)
+
+        self.lead.message_post(body="Posted later", message_type='comment')
+        self.assertIn(self.order.id, self.env['sale.order']._get_chatter_sync_order_ids())
+        self.order._sync_chatter_from_crm()
+        bodies = self._transferred_bodies()
+        self.assertEqual(len(bodies), 4)
+        self.assertIn("Posted later", bodies[-1])
+
+    def test_confirmed_orders_are_not_replayed(self):
+        # an order confirmed before the watermark existed keeps its chatter as it is
+        self.order.action_confirm()
+        self.assertFalse(self.order.chatter_sync_message_id)
+        self.assertNotIn(self.order.id, self.env['sale.order']._get_chatter_sync_order_ids())
@@ -13,7 +13,10 @@
         "security/ir.model.access.csv",
         "views/pricing_scale_views.xml",
         "views/sale_order_views.xml",
+        "views/zip_distance_views.xml",
         "data/pricing_scale_initial_data.xml",
+        "data/ir_config_parameter_data.xml",
+        "data/ir_cron_data.xml",
     ],
     'post_init_hook': 'initialize_pricing_scale',
 }
@@ -1,3 +1,5 @@
 from . import sale_order_line
 from . import pricing_scale
-from . import sale_order
\ No newline at end of file
+from . import sale_order
+from . import zip_centroid
+from . import zip_distance
@@ -1,6 +1,18 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.tools import SQL, float_compare
+from bisect import bisect_left
+from collections import defaultdict
+import csv
+import io
 from itertools import product
 
+# Upper bounds (km) of the distance intervals, in selection order
+DISTANCE_INTERVAL_LIMITS = [(50, '1'), (150, '2'), (275, '3'), (550, '4')]
+
+# Fields whose change makes the cached tariff matrix stale
+TARIFF_FIELDS = ('cost', 'weight_kg', 'distance_interval', 'max_height')
+
+
 class PricingScale(models.Model):
     _name = 'pricing.scale'
 
@@ -31,6 +43,135 @@ class PricingScale(models.Model):
         for rec in self:
             rec.lademeter = rec.weight_kg / 700 if rec.weight_kg else 0
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        # a new cell can take lines from its neighbours
+        records._tariff_changed(records.mapped('distance_interval'))
+        return records
+
+    def write(self, vals):
+        key_changed = any(fname in vals for fname in TARIFF_FIELDS if fname != 'cost')
+        distance_intervals = set(self.mapped('distance_interval')) if key_changed else set()
+        res = super().write(vals)
+        if any(fname in vals for fname in TARIFF_FIELDS):
+            self.env.registry.clear_cache()
+            if key_changed:
+                distance_intervals |= set(self.mapped('distance_interval'))
+            self._tariff_changed(distance_intervals)
+        return res
+
+    def unlink(self):
+        # flagged before the lines lose their cell
+        self._tariff_changed(self.mapped('distance_interval'))
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    def _tariff_changed(self, distance_intervals):
+        """ Hook called when the grid changes: the costs of the cells in
+        ``self`` changed, and the cells of ``distance_intervals`` were added,
+        moved or removed. Flags the open quotations priced from them for the
+        requote cron; modules pricing other lines from the grid extend it.
+        """
+        self.env['sale.order']._mark_requote(set(distance_intervals) | set(self.mapped('distance_interval')))
+
+    @api.model
+    def _distance_interval_for(self, distance):
+        for limit, interval in DISTANCE_INTERVAL_LIMITS:
+            if distance <= limit:
+                return interval
+        return '5'
+
+    @api.model
+    @tools.ormcache()
+    def _get_tariff_matrix(self):
+        # {(distance_interval, max_height): (sorted weights, (id, cost) cells)},
+        # (distance_interval, None) merges all heights of a distance.
+        # Cached per worker, dropped whenever a tariff cell changes.
+        self.flush_model(TARIFF_FIELDS)
+        self.env.cr.execute("""
+            SELECT id, distance_interval, max_height, weight_kg, cost
+              FROM pricing_scale
+          ORDER BY weight_kg, id
+        """)
+        rows = {}
+        for cell_id, distance, height, weight, cost in self.env.cr.fetchall():
+            cell = (weight or 0.0, (cell_id, cost or 0.0))
+            rows.setdefault((distance, height), []).append(cell)
+            rows.setdefault((distance, None), []).append(cell)
+        return {
+            key: (tuple(weight for weight, _cell in cells), tuple(cell for _weight, cell in cells))
+            for key, cells in rows.items()
+        }
+
+    @api.model
+    def _lookup_cells(self, keys):
+        # a weight falls into the first cell whose weight_kg is greater or equal
+        matrix = self._get_tariff_matrix()
+        result = []
+        for distance, height, weight in keys:
+            weights, cells = matrix.get((distance, height or None), ((), ()))
+            index = bisect_left(weights, weight or 0.0)
+            result.append(cells[index] if index < len(cells) else None)
+        return result
+
+    @api.model
+    def _price_lines(self, lines, quantity_fname):
+        """ Price ``lines`` from the tariff grid, with one lookup and one write
+        per distinct (cell, unit price). The cell prices the whole line, lines
+        without a matching cell keep their price.
+        """
+        cells = self._lookup_cells(self._tariff_keys(lines))
+        precision = self.env['decimal.precision'].precision_get('Product Price')
+        to_write = defaultdict(list)
+        for line, cell in zip(lines, cells):
+            if not cell:
+                if line.pricing_scale_id:
+                    to_write[False, None].append(line.id)
+                continue
+            cell_id, cost = cell
+            price_unit = cost / line[quantity_fname] if line[quantity_fname] else cost
+            if line.pricing_scale_id.id != cell_id or float_compare(
+                    line.price_unit, price_unit, precision_digits=precision):
+                to_write[cell_id, price_unit].append(line.id)
+        for (cell_id, price_unit), line_ids in to_write.items():
+            vals = {'pricing_scale_id': cell_id}
+            if price_unit is not None:
+                vals['price_unit'] = price_unit
+            lines.browse(line_ids).write(vals)
+
+    @api.model
+    def _tariff_keys(self, lines, distance_interval=None):
+        if isinstance(lines, models.BaseModel):
+            if lines._name == 'sale.order.line':
+                return [
+                    (distance_interval or line.order_id.distance_interval, None, line.weight)
+                    for line in lines
+                ]
+            raise ValueError("Cannot price records of model %s" % lines._name)
+        keys = []
+        for line in lines:
+            if isinstance(line, dict):
+                distance = line.get('distance_interval') or distance_interval
+                if not distance and line.get('distance') is not None:
+                    distance = self._distance_interval_for(line['distance'])
+                keys.append((distance, line.get('max_height'), line.get('weight', 0.0)))
+            else:
+                keys.append(tuple(line))
+        return keys
+
+    @api.model
+    def lookup_batch(self, lines, distance_interval=None):
+        """ Price a sale.order.line recordset, or an iterable of
+        (distance_interval, max_height, weight) tuples or dicts, against the
+        cached tariff matrix. Returns costs in input order, ``None`` when no
+        tariff cell applies.
+        """
+        cells = self._lookup_cells(self._tariff_keys(lines, distance_interval))
+        return [cell[1] if cell else None for cell in cells]
+
     @api.model
     def generate_combinations(self):
         distance_vals = ['1', '2', '3', '4', '5']
@@ -41,18 +182,87 @@ class PricingScale(models.Model):
             '3': [11000, 14000, 17000, 20000, 23600],
         }
 
-        for dist, height in product(distance_vals, weights_by_height.keys()):
-            for weight in weights_by_height[height]:
-                exists = self.search([
-                    ('distance_interval', '=', dist),
-                    ('max_height', '=', height),
-                    ('weight_kg', '=', weight),
-                ], limit=1)
-
-                if not exists:
-                    self.create({
-                        'distance_interval': dist,
-                        'max_height': height,
-                        'weight_kg': weight,
-                        'cost': 0.0,  # vide pour que l'utilisateur remplisse
-                    })
\ No newline at end of file
+        cells = [
+            {
+                'distance_interval': dist,
+                'max_height': height,
+                'weight_kg': weight,
+                'cost': 0.0,  # vide pour que l'utilisateur remplisse
+            }
+            for dist, height in product(distance_vals, weights_by_height.keys())
+            for weight in weights_by_height[height]
+        ]
+        return self.load_tariff_matrix(cells, upsert=False)
+
+    @api.model
+    def load_tariff_matrix(self, cells, upsert=True):
+        """ Seed or update the tariff grid from an iterable of cell dicts
+        (distance_interval, max_height, weight_kg, cost) with one read of the
+        existing keys, one batched create and, in upsert mode, one UPDATE of
+        the changed costs. Returns the number of created and updated cells.
+        """
+        self.flush_model(TARIFF_FIELDS)
+        self.env.cr.execute("SELECT id, distance_interval, max_height, weight_kg, cost FROM pricing_scale")
+        existing = {
+            (distance, height, weight or 0.0): (cell_id, cost or 0.0)
+            for cell_id, distance, height, weight, cost in self.env.cr.fetchall()
+        }
+
+        to_create = {}
+        to_update = {}
+        for cell in cells:
+            key = (cell['distance_interval'], cell['max_height'], float(cell.get('weight_kg') or 0.0))
+            cost = float(cell.get('cost') or 0.0)
+            if key in existing:
+                cell_id, current_cost = existing[key]
+                if upsert and cost != current_cost:
+                    to_update[cell_id] = cost
+            elif key in to_create:
+                if upsert:
+                    to_create[key]['cost'] = cost
+            else:
+                to_create[key] = {
+                    'distance_interval': key[0],
+                    'max_height': key[1],
+                    'weight_kg': key[2],
+                    'cost': cost,
+                }
+
+        if to_create:
+            self.create(list(to_create.values()))
+        if to_update:
+            self.env.cr.execute(SQL(
+                """
+                UPDATE pricing_scale AS ps
+                   SET cost = v.cost, write_uid = %s, write_date = (now() at time zone 'UTC')
+                  FROM (VALUES %s) AS v(id, cost)
+                 WHERE ps.id = v.id
+                """,
+                self.env.uid,
+                SQL(", ").join(SQL("(%s, %s::float8)", cell_id, cost) for cell_id, cost in to_update.items()),
+            ))
+            updated = self.browse(list(to_update))
+            updated.invalidate_recordset(['cost', 'write_uid', 'write_date'])
+            updated.modified(['cost'])
+            self.env.registry.clear_cache()
+            updated._tariff_changed(())
+        return {'created': len(to_create), 'updated': len(to_update)}
+
+    @api.model
+    def load_tariff_csv(self, content, delimiter=','):
+        """ Upsert a full tariff matrix from CSV text or bytes with the columns
+        distance_interval, max_height, weight_kg and cost, in one transaction.
+        """
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+        reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
+        cells = (
+            {
+                'distance_interval': row['distance_interval'].strip(),
+                'max_height': row['max_height'].strip(),
+                'weight_kg': float(row['weight_kg']),
+                'cost': float(row.get('cost') or 0.0),
+            }
+            for row in reader
+        )
+        return self.load_tariff_matrix(cells)
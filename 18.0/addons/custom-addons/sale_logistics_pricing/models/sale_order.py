@@ -1,4 +1,8 @@
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+QUOTABLE_STATES = ('draft', 'sent')
+
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -11,6 +15,84 @@ class SaleOrder(models.Model):
     ], "Shipment type")
 
     zip_destination = fields.Char(string='ZIP')
-    distance = fields.Float(string='Distance')
+    distance = fields.Float(string='Distance', compute='_compute_distance', store=True, readonly=False)
+    distance_interval = fields.Selection(
+        selection=lambda self: self.env['pricing.scale']._fields['distance_interval'].selection,
+        string="Distance interval", compute='_compute_distance_interval', store=True)
+    requote_needed = fields.Boolean(
+        string="Requote needed", copy=False,
+        help="The tariff grid changed since the order was quoted, the requote cron prices it again.")
+
+    def init(self):
+        super().init()
+        create_index(self.env.cr, 'sale_order_requote_needed_index', self._table, ['id'], where='requote_needed')
+
+    @api.depends('zip_destination', 'company_id.zip')
+    def _compute_distance(self):
+        # orders whose route is unknown keep the distance typed in
+        origin_zip = self.env['ir.config_parameter'].sudo().get_param('sale_logistics_pricing.origin_zip')
+        pairs = {order: (origin_zip or order.company_id.zip, order.zip_destination) for order in self}
+        distances = self.env['zip.distance']._get_distances(set(pairs.values()))
+        for order, pair in pairs.items():
+            order.distance = round(distances[pair], 1) if pair in distances else order.distance
+
+    @api.depends('distance')
+    def _compute_distance_interval(self):
+        # an order without distance has no band to be quoted in
+        for order in self:
+            order.distance_interval = (
+                self.env['pricing.scale']._distance_interval_for(order.distance) if order.distance else False
+            )
+
+    def action_quote_logistics(self):
+        self._quote()
+        return True
+
+    def _quote(self):
+        """ Price the weighted lines of the open quotations against the tariff
+        grid, all orders at once: one cell lookup for every line and one write
+        per distinct (cell, unit price). Lines without a matching cell keep
+        their price, orders without distance interval are skipped.
+        """
+        orders = self.filtered(lambda order: order.state in QUOTABLE_STATES and order.distance_interval)
+        lines = orders.order_line.filtered(lambda line: not line.display_type and line.weight)
+        self.env['pricing.scale']._price_lines(lines, 'product_uom_qty')
+        self.filtered('requote_needed').requote_needed = False
 
+    @api.model
+    def _mark_requote(self, distance_intervals):
+        """ Flag the open quotations with weighted lines in ``distance_intervals``
+        after a tariff change, for the requote cron to price them again.
+        """
+        distance_intervals = [interval for interval in distance_intervals if interval]
+        if not distance_intervals:
+            return
+        self.flush_model(['state', 'distance_interval', 'requote_needed'])
+        self.env['sale.order.line'].flush_model(['order_id', 'weight', 'display_type'])
+        self.env.cr.execute("""
+            UPDATE sale_order so
+               SET requote_needed = true
+             WHERE so.state IN %s
+               AND so.distance_interval = ANY(%s)
+               AND so.requote_needed IS NOT TRUE
+               AND EXISTS (SELECT 1
+                             FROM sale_order_line sol
+                            WHERE sol.order_id = so.id
+                              AND sol.display_type IS NULL
+                              AND sol.weight > 0)
+         RETURNING so.id
+        """, [QUOTABLE_STATES, distance_intervals])
+        order_ids = [row[0] for row in self.env.cr.fetchall()]
+        if order_ids:
+            self.browse(order_ids).invalidate_recordset(['requote_needed'])
+            self.env.ref('sale_logistics_pricing.ir_cron_requote_orders')._trigger()
 
+    @api.model
+    def _cron_requote_orders(self, batch_size=500):
+        orders = self.search([('requote_needed', '=', True)], order='id', limit=batch_size)
+        orders._quote()
+        orders.requote_needed = False
+        self.env['ir.cron']._notify_progress(
+            done=len(orders),
+            remaining=self.search_count([('requote_needed', '=', True)]),
+        )
@@ -7,6 +7,8 @@ class SaleOrderLine(models.Model):
     weight = fields.Float(string='Weight')
     lademeter = fields.Float(string='Lademeter', compute="_compute_lademeter", store=True, digits=(16, 1))
     volume = fields.Float(string='Volume', compute="_compute_volume", store=True, digits=(16, 2))
+    pricing_scale_id = fields.Many2one('pricing.scale', string='Tariff cell', index='btree_not_null',
+                                       readonly=True, copy=False, ondelete='set null')
 
     @api.depends('weight')
     def _compute_lademeter(self):
@@ -0,0 +1,82 @@
+import csv
+import io
+
+from odoo import models, fields, api
+from odoo.tools import SQL, split_every
+
+# GeoNames postal code dump: country, zip, place, admin1..3 (name, code), lat, lon, accuracy
+GEONAMES_ZIP, GEONAMES_LATITUDE, GEONAMES_LONGITUDE = 1, 9, 10
+
+
+class ZipCentroid(models.Model):
+    _name = 'zip.centroid'
+    _description = "ZIP centroid"
+    _rec_name = 'zip'
+
+    zip = fields.Char(string='ZIP', required=True, index=True)
+    latitude = fields.Float(string='Latitude', digits=(10, 6), required=True)
+    longitude = fields.Float(string='Longitude', digits=(10, 6), required=True)
+
+    _sql_constraints = [
+        ('zip_uniq', 'unique(zip)', 'A ZIP can only have one centroid.'),
+    ]
+
+    @api.model
+    def _get_centroids(self, zips):
+        """ Return {zip: (latitude, longitude)} for the known ``zips``. """
+        zips = [zip_code for zip_code in zips if zip_code]
+        if not zips:
+            return {}
+        self.flush_model(['zip', 'latitude', 'longitude'])
+        self.env.cr.execute("SELECT zip, latitude, longitude FROM zip_centroid WHERE zip = ANY(%s)", [zips])
+        return {zip_code: (latitude, longitude) for zip_code, latitude, longitude in self.env.cr.fetchall()}
+
+    @api.model
+    def import_centroids(self, content, file_format='csv', chunk_size=5000):
+        """ Upsert centroids from CSV text or bytes (zip, latitude, longitude
+        columns) or from a GeoNames postal code dump. Returns the number of rows.
+        """
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+        if file_format == 'geonames':
+            rows = (
+                (row[GEONAMES_ZIP].strip(), (float(row[GEONAMES_LATITUDE]), float(row[GEONAMES_LONGITUDE])))
+                for row in csv.reader(io.StringIO(content), delimiter='\t')
+                if len(row) > GEONAMES_LONGITUDE and row[GEONAMES_LATITUDE]
+            )
+        else:
+            rows = (
+                (row['zip'].strip(), (float(row['latitude']), float(row['longitude'])))
+                for row in csv.DictReader(io.StringIO(content))
+            )
+        count = 0
+        self.flush_model()
+        self.env['zip.distance'].flush_model()
+        for chunk in split_every(chunk_size, rows, dict):
+            # a dump lists a ZIP once per place, and an upsert cannot touch
+            # a row twice: the chunk keeps the last place of each ZIP
+            self.env.cr.execute(SQL(
+                """
+                INSERT INTO zip_centroid (zip, latitude, longitude, create_uid, create_date, write_uid, write_date)
+                     SELECT v.zip, v.latitude, v.longitude, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+                       FROM (VALUES %s) AS v(zip, latitude, longitude)
+                ON CONFLICT (zip) DO UPDATE
+                        SET latitude = EXCLUDED.latitude, longitude = EXCLUDED.longitude,
+                            write_uid = EXCLUDED.write_uid, write_date = EXCLUDED.write_date
+                """,
+                self.env.uid, self.env.uid,
+                SQL(", ").join(
+                    SQL("(%s, %s::float8, %s::float8)", zip_code, latitude, longitude)
+                    for zip_code, (latitude, longitude) in chunk.items()
+                ),
+            ))
+            # cached distances from the former centroids are stale
+            self.env.cr.execute("""
+                DELETE FROM zip_distance
+                 WHERE (manual_distance IS NULL OR manual_distance = 0)
+                   AND (origin_zip = ANY(%s) OR destination_zip = ANY(%s))
+            """, [list(chunk), list(chunk)])
+            count += len(chunk)
+        self.invalidate_model()
+        self.env['zip.distance'].invalidate_model()
+        return count
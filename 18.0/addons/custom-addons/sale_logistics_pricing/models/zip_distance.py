@@ -0,0 +1,88 @@
+from math import asin, cos, radians, sin, sqrt
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_ROAD_FACTOR = 1.3
+
+
+def haversine(origin, destination):
+    """ Great-circle distance in km between two (latitude, longitude) points. """
+    lat1, lon1 = map(radians, origin)
+    lat2, lon2 = map(radians, destination)
+    a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+class ZipDistance(models.Model):
+    _name = 'zip.distance'
+    _description = "ZIP distance cache"
+    _order = 'origin_zip, destination_zip'
+
+    # pairs are stored once, with origin_zip <= destination_zip
+    origin_zip = fields.Char(string='From ZIP', required=True)
+    destination_zip = fields.Char(string='To ZIP', required=True)
+    air_distance = fields.Float(string='Air distance (km)', digits=(16, 1))
+    manual_distance = fields.Float(string='Road distance (km)', digits=(16, 1),
+                                   help="Known road distance, used instead of the estimation when set")
+
+    _sql_constraints = [
+        ('zip_pair_uniq', 'unique(origin_zip, destination_zip)', 'A ZIP pair can only be cached once.'),
+    ]
+
+    @api.model
+    def _get_road_factor(self):
+        return float(self.env['ir.config_parameter'].sudo().get_param(
+            'sale_logistics_pricing.road_factor', DEFAULT_ROAD_FACTOR))
+
+    @api.model
+    def _get_distances(self, pairs):
+        """ Return {(origin, destination): road km} for the given ZIP pairs.
+        Pairs missing from the cache are estimated from the ZIP centroids
+        (haversine times the road factor) and stored; pairs with an unknown
+        centroid are left out.
+        """
+        keys = {pair: tuple(sorted(pair)) for pair in pairs if pair[0] and pair[1]}
+        if not keys:
+            return {}
+        road_factor = self._get_road_factor()
+        self.flush_model()
+        self.env.cr.execute(SQL(
+            """
+            SELECT origin_zip, destination_zip, COALESCE(NULLIF(manual_distance, 0), air_distance * %s)
+              FROM zip_distance
+             WHERE (origin_zip, destination_zip) IN (%s)
+            """,
+            road_factor,
+            SQL(", ").join(SQL("(%s, %s)", *key) for key in set(keys.values())),
+        ))
+        distances = {(origin, destination): distance for origin, destination, distance in self.env.cr.fetchall()}
+
+        missing = set(keys.values()) - distances.keys()
+        if missing:
+            centroids = self.env['zip.centroid']._get_centroids({zip_code for key in missing for zip_code in key})
+            air_distances = {
+                key: haversine(centroids[key[0]], centroids[key[1]])
+                for key in missing
+                if key[0] in centroids and key[1] in centroids
+            }
+            if air_distances:
+                # concurrent quotes may cache the same pair
+                self.env.cr.execute(SQL(
+                    """
+                    INSERT INTO zip_distance (origin_zip, destination_zip, air_distance,
+                                              create_uid, create_date, write_uid, write_date)
+                         SELECT v.origin_zip, v.destination_zip, v.air_distance,
+                                %s, now() at time zone 'UTC', %s, now() at time zone 'UTC'
+                           FROM (VALUES %s) AS v(origin_zip, destination_zip, air_distance)
+                    ON CONFLICT DO NOTHING
+                    """,
+                    self.env.uid, self.env.uid,
+                    SQL(", ").join(
+                        SQL("(%s, %s, %s::float8)", origin, destination, air_distance)
+                        for (origin, destination), air_distance in air_distances.items()
+                    ),
+                ))
+                distances.update({key: air_distance * road_factor for key, air_distance in air_distances.items()})
+        return {pair: distances[key] for pair, key in keys.items() if key in distances}
@@ -0,0 +1,2 @@
+from . import test_logistics_quote
+from . import test_pricing_scale_benchmark
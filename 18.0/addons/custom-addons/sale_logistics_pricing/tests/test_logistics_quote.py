@@ -0,0 +1,70 @@
+from odoo.tests import TransactionCase, tagged
+
+from ..models.zip_distance import haversine
+
+
+@tagged('post_install', '-at_install')
+class TestLogisticsQuote(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env.company.zip = '60549'
+        cls.env['ir.config_parameter'].set_param('sale_logistics_pricing.origin_zip', False)
+        cls.env['ir.config_parameter'].set_param('sale_logistics_pricing.road_factor', '1.3')
+        cls.env['zip.centroid'].import_centroids("zip,latitude,longitude\n60549,50.05,8.57\n65428,49.99,8.41\n")
+        cls.pricing_scale = cls.env['pricing.scale']
+        cls.pricing_scale.load_tariff_matrix([
+            {'distance_interval': '1', 'max_height': '1', 'weight_kg': 1000, 'cost': 120.0},
+            {'distance_interval': '1', 'max_height': '2', 'weight_kg': 1500, 'cost': 160.0},
+        ])
+        cls.partner = cls.env['res.partner'].create({'name': 'Customer'})
+        cls.product = cls.env['product.product'].create({'name': 'Freight', 'type': 'service'})
+
+    def _order(self, zip_destination, weights):
+        return self.env['sale.order'].create({
+            'partner_id': self.partner.id,
+            'shipment_type': 'export',
+            'zip_destination': zip_destination,
+            'order_line': [
+                {'product_id': self.product.id, 'product_uom_qty': 2, 'weight': weight} for weight in weights
+            ],
+        })
+
+    def test_distance_from_centroids(self):
+        order = self._order('65428', [800])
+        expected = haversine((50.05, 8.57), (49.99, 8.41)) * 1.3
+        self.assertAlmostEqual(order.distance, round(expected, 1))
+        self.assertEqual(order.distance_interval, '1')
+        self.assertTrue(self.env['zip.distance'].search_count([
+            ('origin_zip', '=', '60549'), ('destination_zip', '=', '65428'),
+        ]))
+
+        # unknown ZIPs keep the distance typed in
+        order.write({'zip_destination': '99999', 'distance': 700})
+        self.assertEqual(order.distance, 700)
+        self.assertEqual(order.distance_interval, '5')
+
+    def test_unknown_distance_is_not_quoted(self):
+        order = self._order('99999', [800])
+        order.order_line.price_unit = 42.0
+        self.assertFalse(order.distance)
+        self.assertFalse(order.distance_interval)
+        order.action_quote_logistics()
+        self.assertEqual(order.order_line.price_unit, 42.0)
+        self.assertFalse(order.order_line.pricing_scale_id)
+
+    def test_quote_and_requote(self):
+        orders = self._order('65428', [800, 1200]) | self._order('65428', [900])
+        orders.action_quote_logistics()
+        lines = orders.order_line
+        self.assertEqual(lines.mapped('price_unit'), [60.0, 80.0, 60.0])
+        self.assertEqual(lines[0].pricing_scale_id.weight_kg, 1000)
+
+        self.pricing_scale.load_tariff_matrix([
+            {'distance_interval': '1', 'max_height': '1', 'weight_kg': 1000, 'cost': 150.0},
+        ])
+        self.assertTrue(all(orders.mapped('requote_needed')))
+        self.env['sale.order']._cron_requote_orders()
+        self.assertFalse(any(orders.mapped('requote_needed')))
+        self.assertEqual(lines.mapped('price_unit'), [75.0, 80.0, 75.0])
@@ -0,0 +1,76 @@
+import logging
+from itertools import product
+
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged('post_install', '-at_install', 'pricing_benchmark')
+class TestPricingScaleBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.PricingScale = cls.env['pricing.scale']
+        cls.PricingScale.search([]).unlink()
+
+    def _count_queries(self, func):
+        self.env.flush_all()
+        start = self.env.cr.sql_log_count
+        func()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - start
+
+    def _legacy_generate_combinations(self):
+        # former row-by-row seeder, kept as the benchmark baseline
+        weights_by_height = {
+            '1': [1000],
+            '2': [1500, 2000, 2500, 3000, 4000, 5000, 7000, 9000],
+            '3': [11000, 14000, 17000, 20000, 23600],
+        }
+        for dist, height in product(['1', '2', '3', '4', '5'], weights_by_height.keys()):
+            for weight in weights_by_height[height]:
+                exists = self.PricingScale.search([
+                    ('distance_interval', '=', dist),
+                    ('max_height', '=', height),
+                    ('weight_kg', '=', weight),
+                ], limit=1)
+                if not exists:
+                    self.PricingScale.create({
+                        'distance_interval': dist,
+                        'max_height': height,
+                        'weight_kg': weight,
+                        'cost': 0.0,
+                    })
+                    self.env.flush_all()
+
+    def test_generate_combinations_query_count(self):
+        legacy = self._count_queries(self._legacy_generate_combinations)
+        self.assertEqual(self.PricingScale.search_count([]), 70)
+        self.PricingScale.search([]).unlink()
+
+        batched = self._count_queries(self.PricingScale.generate_combinations)
+        self.assertEqual(self.PricingScale.search_count([]), 70)
+        _logger.info("pricing.scale seeding: %s queries before, %s queries after", legacy, batched)
+        self.assertLess(batched, legacy)
+
+        # reseeding an existing grid only reads the keys
+        reseed = self._count_queries(self.PricingScale.generate_combinations)
+        self.assertEqual(self.PricingScale.search_count([]), 70)
+        self.assertLessEqual(reseed, 2)
+
+    def test_load_tariff_csv_upsert(self):
+        self.PricingScale.generate_combinations()
+        rows = ["distance_interval,max_height,weight_kg,cost"]
+        rows += ["%s,2,%s,%s" % (dist, weight, weight / 100) for dist in '12345' for weight in range(1500, 9001, 10)]
+        content = "\n".join(rows)
+
+        queries = self._count_queries(lambda: self.PricingScale.load_tariff_csv(content))
+        _logger.info("pricing.scale CSV upsert of %s cells: %s queries", len(rows) - 1, queries)
+        self.assertEqual(self.PricingScale.search_count([]), 70 - 5 * 8 + len(rows) - 1)
+        cell = self.PricingScale.search([
+            ('distance_interval', '=', '3'), ('max_height', '=', '2'), ('weight_kg', '=', 2000),
+        ])
+        self.assertEqual(cell.cost, 20.0)
+        self.assertEqual(self.PricingScale.lookup_batch([('3', '2', 1995)]), [20.0])
@@ -1,3 +1,4 @@
+from . import controllers
 from . import models
-
-from .data.pricing_scale_init import initialize_pricing_scale
\ No newline at end of file
+from . import report
+from . import wizard
@@ -8,23 +8,27 @@
     "category": "sales",
     "author": "Tayssir Werfelli",
     "website": "",
-    "depends": ["sale"],
+    "depends": ["sale", "sale_logistics_pricing"],
     "data": [
         "security/ir.model.access.csv",
 
-        "data/pricing_scale_initial_data.xml",
         "data/shipment_sequence.xml",
+        "data/ir_cron_data.xml",
 
-        "views/pricing_scale_views.xml",
         "views/shipment_views.xml",
         "views/res_partner_views.xml",
         "views/shipment_vehicle_category_views.xml",
         "views/shipment_vehicle_views.xml",
-        "views/sale_order_views.xml",
+
+        "report/shipment_report_views.xml",
+        "wizard/postal_code_import_views.xml",
+        "wizard/shipment_query_plan_views.xml",
+        "wizard/vehicle_assignment_views.xml",
+        "wizard/shipment_import_views.xml",
+        "wizard/shipment_export_views.xml",
 
 
 
         "views/shipment_menus.xml",
     ],
-    'post_init_hook': 'initialize_pricing_scale',
 }
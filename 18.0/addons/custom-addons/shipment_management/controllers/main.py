@@ -0,0 +1,46 @@
+import logging
+import time
+
+from odoo import api, http
+from odoo.http import content_disposition, request
+from odoo.modules.registry import Registry
+
+from ..tools.shipment_io import FORMATS, iter_csv, iter_jsonl
+
+_logger = logging.getLogger(__name__)
+
+
+def _stream_shipments(dbname, uid, context, shipment_ids, file_format, delimiter):
+    # the request cursor is closed once the response starts streaming,
+    # the export reads through its own
+    start = time.perf_counter()
+    count = 0
+    with Registry(dbname).cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        shipments = env['shipment.management'].browse(shipment_ids)._iter_export()
+        chunks = iter_jsonl(shipments) if file_format == 'jsonl' else iter_csv(shipments, delimiter)
+        for chunk in chunks:
+            count += 1
+            yield chunk.encode()
+    duration = time.perf_counter() - start
+    # the CSV header counts as a chunk
+    rows = count if file_format == 'jsonl' else count - 1
+    _logger.info("Exported %s shipments at %.0f rows/s", rows, rows / duration if duration else 0.0)
+
+
+class ShipmentExportController(http.Controller):
+
+    @http.route('/shipment_management/export/<int:export_id>', type='http', auth='user')
+    def export_shipments(self, export_id, **kwargs):
+        export = request.env['shipment.export'].browse(export_id).exists()
+        if not export:
+            raise request.not_found()
+        content_type, extension = FORMATS[export.file_format]
+        stream = _stream_shipments(
+            request.env.cr.dbname, request.env.uid, dict(request.env.context),
+            export.shipment_ids.ids, export.file_format, export.delimiter or ',',
+        )
+        return request.make_response(stream, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', content_disposition('shipments.%s' % extension)),
+        ])
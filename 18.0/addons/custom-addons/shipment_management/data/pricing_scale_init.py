@@ -1,4 +0,0 @@
-from odoo import api, SUPERUSER_ID
-
-def initialize_pricing_scale(env):
-    env['pricing.scale'].generate_combinations()
\ No newline at end of file
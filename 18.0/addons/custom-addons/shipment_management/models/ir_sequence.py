@@ -0,0 +1,59 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class IrSequence(models.Model):
+    _inherit = 'ir.sequence'
+
+    @api.model
+    def next_block_by_code(self, sequence_code, count, sequence_date=None):
+        """ Reserve ``count`` values of the sequence ``sequence_code`` of the
+        current company in one round trip. Returns them in increasing order,
+        or False when no such sequence exists.
+        """
+        self.check_access('read')
+        company_id = self.env.company.id
+        sequence = self.search([('code', '=', sequence_code), ('company_id', 'in', [company_id, False])],
+                               order='company_id', limit=1)
+        if not sequence:
+            return False
+        return sequence._next_block(count, sequence_date=sequence_date)
+
+    def _next_block(self, count, sequence_date=None):
+        self.ensure_one()
+        if count <= 0:
+            return []
+        if not self.use_date_range:
+            numbers = self._reserve_numbers(self, 'ir_sequence_%03d' % self.id, count)
+            return [self.get_next_char(number) for number in numbers]
+
+        date = sequence_date or self.env.context.get('ir_sequence_date', fields.Date.today())
+        date_range = self.env['ir.sequence.date_range'].search([
+            ('sequence_id', '=', self.id),
+            ('date_from', '<=', date),
+            ('date_to', '>=', date),
+        ], limit=1)
+        if not date_range:
+            date_range = self._create_date_range_seq(date)
+        numbers = self._reserve_numbers(date_range, 'ir_sequence_%03d_%03d' % (self.id, date_range.id), count)
+        sequence = self.with_context(ir_sequence_date=date, ir_sequence_date_range=date_range.date_from)
+        return [sequence.get_next_char(number) for number in numbers]
+
+    def _reserve_numbers(self, record, sequence_name, count):
+        # ``record`` is the sequence or its date range, which holds number_next
+        # for no_gap sequences
+        if self.implementation == 'standard':
+            # unique but only contiguous when no other transaction draws at the same time
+            self.env.cr.execute(SQL("SELECT nextval(%s) FROM generate_series(1, %s)", sequence_name, count))
+            return sorted(row[0] for row in self.env.cr.fetchall())
+
+        # no_gap: move number_next by the whole block, the row stays locked until commit
+        step = self.number_increment
+        record.flush_recordset(['number_next'])
+        self.env.cr.execute(SQL(
+            "UPDATE %s SET number_next = number_next + %s WHERE id = %s RETURNING number_next",
+            SQL.identifier(record._table), step * count, record.id,
+        ))
+        end = self.env.cr.fetchone()[0]
+        record.invalidate_recordset(['number_next'])
+        return list(range(end - step * count, end, step))
@@ -1,13 +1,260 @@
 # -*- coding: utf-8 -*-
-from odoo import fields, models
+import logging
+import time
+from bisect import bisect_left
+
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL, split_every
+from odoo.tools.sql import create_index, create_unique_index, index_exists
+
+from ..tools.zip_codes import is_valid_zip, read_postal_codes
+
+_logger = logging.getLogger(__name__)
+
+# set in cr.postcommit.data by a transaction that changed postal codes
+ZIP_INDEX_STALE = 'shipment_management.zip_index_stale'
+
 
 class PostalCode(models.Model):
     _name = 'postal.code'
 
-    name = fields.Char('ZIP', help="ZIP number")
+    name = fields.Char('ZIP', help="ZIP number", index=True)
     zone = fields.Selection(
         [("1", "1"), ("2", "2")],
         string="Zone",
     )
     code = fields.Char(string="Code")
-    city = fields.Char(string="City", required=True)
\ No newline at end of file
+    city = fields.Char(string="City", required=True)
+    country_id = fields.Many2one('res.country', string="Country")
+
+    def init(self):
+        # btree on the raw pattern so prefix searches (LIKE '12%') can use it
+        create_index(self.env.cr, 'postal_code_name_prefix_index', self._table, ['name text_pattern_ops'])
+        # conflict target of the bulk importer upsert
+        if not index_exists(self.env.cr, 'postal_code_country_name_city_uniq'):
+            self._merge_duplicates()
+            create_unique_index(self.env.cr, 'postal_code_country_name_city_uniq', self._table,
+                                ['(COALESCE(country_id, 0))', 'name', 'city'])
+
+    def _merge_duplicates(self):
+        # keep the oldest postal code of each country/ZIP/city and move the
+        # references to the others onto it before deleting them; duplicates
+        # of different zones are left to be fixed by hand
+        self.env.cr.execute("""
+            SELECT id, keep_id, name, city, zone_conflict
+              FROM (SELECT id, name, city, MIN(id) OVER codes AS keep_id,
+                           MIN(COALESCE(zone, '')) OVER codes != MAX(COALESCE(zone, '')) OVER codes AS zone_conflict
+                      FROM postal_code
+                     WHERE name IS NOT NULL
+                    WINDOW codes AS (PARTITION BY COALESCE(country_id, 0), name, city)) codes
+             WHERE id != keep_id
+          ORDER BY keep_id, id
+        """)
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return
+        mapping = {}
+        conflicts = {}
+        for code_id, keep_id, name, city, zone_conflict in rows:
+            mapping.setdefault(keep_id, []).append(code_id)
+            if zone_conflict:
+                conflicts[keep_id] = (name, city)
+        if conflicts:
+            raise UserError(_(
+                "Duplicated postal codes have different zones, fix their zone or delete them first:\n%s",
+                "\n".join(
+                    "%s %s (ids %s)" % (name, city, ", ".join(map(str, [keep_id] + mapping[keep_id])))
+                    for keep_id, (name, city) in conflicts.items()
+                ),
+            ))
+        merged = [(code_id, keep_id) for code_id, keep_id, *_values in rows]
+        _logger.info("Merging %s duplicated postal codes (kept id: merged ids): %s", len(merged), mapping)
+        values = SQL(", ").join(SQL("(%s, %s)", code_id, keep_id) for code_id, keep_id in merged)
+        for model in self.env.registry.values():
+            if model._abstract or not model._auto:
+                continue
+            for field in model._fields.values():
+                if field.type == 'many2one' and field.comodel_name == self._name and field.store:
+                    self.env.cr.execute(SQL(
+                        "UPDATE %s AS t SET %s = v.keep_id FROM (VALUES %s) AS v(id, keep_id) WHERE t.%s = v.id",
+                        SQL.identifier(model._table), SQL.identifier(field.name), values,
+                        SQL.identifier(field.name),
+                    ))
+        self.env.cr.execute("DELETE FROM postal_code WHERE id = ANY(%s)", [[code_id for code_id, _keep in merged]])
+        self._invalidate_zip_index()
+
+    @api.constrains('name', 'city', 'country_id')
+    def _check_unique_zip_city(self):
+        for code in self.filtered('name'):
+            if self.search_count([
+                ('id', '!=', code.id),
+                ('name', '=', code.name),
+                ('city', '=', code.city),
+                ('country_id', '=', code.country_id.id),
+            ], limit=1):
+                raise ValidationError(_("The postal code %(zip)s %(city)s already exists.",
+                                        zip=code.name, city=code.city))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_zip_index()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'name' in vals:
+            self._invalidate_zip_index()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_zip_index()
+        return res
+
+    @api.model
+    def _invalidate_zip_index(self):
+        # the committed change clears the registry cache, which is signalled
+        # to the other workers; this transaction reads the index uncached until then
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get(ZIP_INDEX_STALE):
+            return
+        postcommit.data[ZIP_INDEX_STALE] = True
+        postcommit.add(self.env.registry.clear_cache)
+
+    @api.model
+    def _zip_index(self):
+        """ Return ({zip: first postal code id}, sorted ((zip, id), ...)) of all
+        postal codes, cached per worker. The index ignores record rules,
+        callers showing it to users check them.
+        """
+        if self.env.cr.postcommit.data.get(ZIP_INDEX_STALE):
+            return self._read_zip_index()
+        return self._get_zip_index()
+
+    @api.model
+    @tools.ormcache()
+    def _get_zip_index(self):
+        return self._read_zip_index()
+
+    @api.model
+    def _read_zip_index(self):
+        self.flush_model(['name'])
+        self.env.cr.execute("SELECT name, id FROM postal_code WHERE name IS NOT NULL ORDER BY name, id")
+        entries = tuple(self.env.cr.fetchall())
+        first_ids = {}
+        for name, code_id in entries:
+            first_ids.setdefault(name, code_id)
+        return first_ids, entries
+
+    @api.model
+    def resolve(self, zip_code):
+        if not zip_code:
+            return self.browse()
+        first_ids = self._zip_index()[0]
+        return self.browse(first_ids.get(zip_code.strip(), []))
+
+    @api.model
+    def resolve_many(self, zip_codes):
+        """ Return ``{zip: postal code id}`` for the given ZIPs, unknown ones are left out. """
+        first_ids = self._zip_index()[0]
+        result = {}
+        for zip_code in zip_codes:
+            code_id = zip_code and first_ids.get(zip_code.strip())
+            if code_id:
+                result[zip_code] = code_id
+        return result
+
+    @api.model
+    def search_prefix(self, prefix, limit=8):
+        entries = self._zip_index()[1]
+        prefix = (prefix or '').strip()
+        ids = []
+        for name, code_id in entries[bisect_left(entries, (prefix,)):]:
+            if not name.startswith(prefix) or (limit and len(ids) >= limit):
+                break
+            ids.append(code_id)
+        return self.browse(ids)
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        # fields searching ZIPs by prefix opt in with the zip_prefix_search context key
+        if (self.env.context.get('zip_prefix_search') and name and name.strip().isdigit() and not domain
+                and operator in ('ilike', '=ilike', 'like', '=like') and self._zip_index_readable()):
+            return [(code.id, code.display_name) for code in self.search_prefix(name, limit)]
+        return super().name_search(name, domain, operator, limit)
+
+    @api.model
+    def _zip_index_readable(self):
+        # the cached index bypasses record rules, only serve it when none apply
+        self.browse().check_access('read')
+        return self.env.su or not self.env['ir.rule']._compute_domain(self._name, 'read')
+
+    @api.model
+    def import_rows(self, rows, country=None, chunk_size=5000):
+        """ Upsert postal code dicts (name, city, code, zone, country_code) in
+        chunks with INSERT ... ON CONFLICT. ``rows`` may be any iterable,
+        typically a generator over a file. Rows without country_code belong to
+        ``country``, rows of an unknown country are skipped. Returns the import
+        statistics; ``duplicates`` counts the rows repeating an earlier row of
+        their chunk, the last one wins.
+        """
+        country_ids = {country.code: country.id for country in self.env['res.country'].search([])}
+        stats = {'rows': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0}
+        start = time.perf_counter()
+
+        def valid_rows():
+            for row in rows:
+                stats['rows'] += 1
+                country_code = (row.get('country_code') or '').strip().upper() or (country and country.code)
+                country_id = country_ids.get(country_code) if country_code else None
+                if (country_code and not country_id) or not is_valid_zip(row.get('name'), country_code) \
+                        or not row.get('city'):
+                    stats['skipped'] += 1
+                    continue
+                yield country_id, row
+
+        self.flush_model()
+        for chunk in split_every(chunk_size, valid_rows()):
+            # the same key twice in one statement would make ON CONFLICT fail
+            unique = {(country_id, row['name'], row['city']): (country_id, row) for country_id, row in chunk}
+            stats['duplicates'] += len(chunk) - len(unique)
+            chunk = unique.values()
+            self.env.cr.execute(SQL(
+                """
+                INSERT INTO postal_code (name, city, code, zone, country_id,
+                                         create_uid, create_date, write_uid, write_date)
+                     SELECT v.name, v.city, v.code, v.zone, v.country_id,
+                            %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                       FROM (VALUES %(values)s) AS v(name, city, code, zone, country_id)
+                ON CONFLICT ((COALESCE(country_id, 0)), name, city) DO UPDATE
+                        SET code = COALESCE(EXCLUDED.code, postal_code.code),
+                            zone = COALESCE(EXCLUDED.zone, postal_code.zone),
+                            write_uid = EXCLUDED.write_uid,
+                            write_date = EXCLUDED.write_date
+                  RETURNING (xmax = 0)
+                """,
+                uid=self.env.uid,
+                values=SQL(", ").join(
+                    SQL("(%s, %s, %s, %s, %s::int4)", row['name'], row['city'], row.get('code') or None,
+                        row.get('zone') if row.get('zone') in ('1', '2') else None, country_id)
+                    for country_id, row in chunk
+                ),
+            ))
+            inserted = sum(1 for (is_new,) in self.env.cr.fetchall() if is_new)
+            stats['inserted'] += inserted
+            stats['updated'] += len(chunk) - inserted
+
+        self.invalidate_model()
+        self._invalidate_zip_index()
+        stats['duration'] = time.perf_counter() - start
+        stats['rows_per_second'] = stats['rows'] / stats['duration'] if stats['duration'] else 0.0
+        _logger.info("Imported postal codes: %(rows)s rows (%(inserted)s new, %(updated)s updated, "
+                     "%(skipped)s skipped, %(duplicates)s duplicates) at %(rows_per_second).0f rows/s", stats)
+        return stats
+
+    @api.model
+    def import_file(self, path, file_format='csv', country=None, delimiter=',', chunk_size=5000):
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            return self.import_rows(read_postal_codes(stream, file_format, delimiter), country, chunk_size)
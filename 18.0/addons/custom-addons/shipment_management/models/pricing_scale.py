@@ -1,57 +1,41 @@
-from odoo import models, fields, api
-from itertools import product
+from odoo import models, api
 
-class PricingScale(models.Model):
-    _name = 'pricing.scale'
 
-    cost = fields.Float(string='Cost' )
-    distance_interval = fields.Selection([
-        ('1', 'Until 50'),
-        ('2', 'Until 150'),
-        ('3', 'Until 275'),
-        ('4', 'Until 550'),
-        ('5', 'Above 550'),
-    ],
-        "Distance interval", required=True
-    )
-    max_height = fields.Selection([
-        ('1', 'Until 220'),
-        ('2', 'Until 260'),
-        ('3', 'Until 300'),
-        ('4', 'Above 300'),
+class PricingScale(models.Model):
+    _inherit = 'pricing.scale'
 
-    ],
-        "Max height", required=True
-    )
-    weight_kg = fields.Float(string='Weight')
-    lademeter = fields.Float(string='Lademeter', compute="_compute_lademeter", store=True, digits=(16, 1))
+    def _tariff_changed(self, distance_intervals):
+        super()._tariff_changed(distance_intervals)
+        cells = self | self._get_interval_cells(distance_intervals)
+        if cells and self.env['shipment.line']._mark_reprice(cells.ids):
+            self.env.ref('shipment_management.ir_cron_reprice_lines')._trigger()
 
-    @api.depends('weight_kg')
-    def _compute_lademeter(self):
-        for rec in self:
-            rec.lademeter = rec.weight_kg / 700 if rec.weight_kg else 0
+    def _get_interval_cells(self, distance_intervals):
+        distance_intervals = [interval for interval in distance_intervals if interval]
+        if not distance_intervals:
+            return self.browse()
+        return self.search([('distance_interval', 'in', distance_intervals)])
 
     @api.model
-    def generate_combinations(self):
-        distance_vals = ['1', '2', '3', '4', '5']
-        weights_by_height = {
-            '1': [1000],
-            '2': [1500, 2000, 2500, 3000, 4000, 5000, 7000, 9000],
-            '3': [11000, 14000, 17000, 20000, 23600],
-        }
+    def _cron_reprice_lines(self, batch_size=1000):
+        # one chunk per call: the cron commits it and calls again while lines remain
+        lines = self.env['shipment.line'].search([('reprice_needed', '=', True)], order='id', limit=batch_size)
+        lines._reprice()
+        self.env['ir.cron']._notify_progress(
+            done=len(lines),
+            remaining=self.env['shipment.line'].search_count([('reprice_needed', '=', True)]),
+        )
 
-        for dist, height in product(distance_vals, weights_by_height.keys()):
-            for weight in weights_by_height[height]:
-                exists = self.search([
-                    ('distance_interval', '=', dist),
-                    ('max_height', '=', height),
-                    ('weight_kg', '=', weight),
-                ], limit=1)
-
-                if not exists:
-                    self.create({
-                        'distance_interval': dist,
-                        'max_height': height,
-                        'weight_kg': weight,
-                        'cost': 0.0,
-                    })
\ No newline at end of file
+    @api.model
+    def _tariff_keys(self, lines, distance_interval=None):
+        # shipment lines use the distance interval of their shipment
+        if isinstance(lines, models.BaseModel) and lines._name == 'shipment.line':
+            return [
+                (
+                    distance_interval or line.shipment_id.distance_interval,
+                    None,
+                    line.chargeable_weight or line.weight,
+                )
+                for line in lines
+            ]
+        return super()._tariff_keys(lines, distance_interval)
@@ -1,5 +1,21 @@
+from functools import partial
+
 from odoo import fields, models, api,_
 from odoo.exceptions import ValidationError
+from odoo.modules.db import FunctionStatus
+from odoo.tools.sql import create_index
+
+from ..tools.ttl_cache import TTLCache
+from ..tools.zip_codes import is_valid_zip
+
+# name_search results of the shipment form partner fields, per context, filled
+# and cleared when the transaction commits
+NAME_SEARCH_CACHE = TTLCache(ttl=30, maxsize=2048)
+NAME_SEARCH_STALE = 'shipment_management.name_search_stale'
+# shipment values derived from a customer, see _get_shipment_defaults, filled
+# and cleared when the transaction commits
+CUSTOMER_DEFAULTS_CACHE = TTLCache(ttl=30, maxsize=4096)
+CUSTOMER_DEFAULTS_STALE = 'shipment_management.customer_defaults_stale'
 
 class ResPartner(models.Model):
     _inherit = "res.partner"
@@ -14,8 +30,102 @@ class ResPartner(models.Model):
         string="Pickup/Delivery Companies",
         tracking=True)
 
+    def init(self):
+        super().init()
+        # substring search on the customer ref and name of the shipment form
+        if not self.env.registry.has_trigram:
+            return
+        unaccent = self.env.registry.has_unaccent == FunctionStatus.INDEXABLE
+        for column, where in (('ref', 'ref IS NOT NULL'), ('complete_name', '')):
+            expression = f'unaccent("{column}")' if unaccent else f'"{column}"'
+            create_index(self.env.cr, f'res_partner_{column}_trigram_index', self._table,
+                         [f'{expression} gin_trgm_ops'], method='gin', where=where)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._invalidate_name_search_cache()
+        self._invalidate_customer_defaults_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._invalidate_name_search_cache()
+        self._invalidate_customer_defaults_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self._invalidate_name_search_cache()
+        self._invalidate_customer_defaults_cache()
+        return super().unlink()
+
+    def _invalidate_name_search_cache(self):
+        # other transactions see the change once committed, this one bypasses
+        # the cache until then
+        postcommit = self.env.cr.postcommit
+        if not postcommit.data.get(NAME_SEARCH_STALE):
+            postcommit.data[NAME_SEARCH_STALE] = True
+            postcommit.add(NAME_SEARCH_CACHE.clear)
+
+    def _invalidate_customer_defaults_cache(self):
+        postcommit = self.env.cr.postcommit
+        if not postcommit.data.get(CUSTOMER_DEFAULTS_STALE):
+            postcommit.data[CUSTOMER_DEFAULTS_STALE] = True
+            postcommit.add(CUSTOMER_DEFAULTS_CACHE.clear)
+
+    @api.model
+    def _get_shipment_defaults(self, partner_ids):
+        """ Return {partner id: values} with the shipment fields the customer
+        onchange sets: the order reference, the GHA and the warehouse when the
+        customer has exactly one of each among its active contacts, and the
+        first delivery company. Partners missing from the cache are read with
+        one aggregated query.
+        """
+        dbname = self.env.cr.dbname
+        # a transaction that changed partners neither reads nor fills the cache
+        use_cache = not self.env.cr.postcommit.data.get(CUSTOMER_DEFAULTS_STALE)
+        result = {}
+        missing = []
+        for partner_id in set(partner_ids):
+            values = CUSTOMER_DEFAULTS_CACHE.get((dbname, partner_id)) if use_cache else None
+            if values is None:
+                missing.append(partner_id)
+            else:
+                result[partner_id] = dict(values)
+        if not missing:
+            return result
+
+        self.flush_model(['parent_id', 'active', 'gha', 'warehouse', 'order_ref', 'company_ids', 'complete_name'])
+        self.env.cr.execute("""
+            SELECT p.id, p.order_ref,
+                   COUNT(c.id) FILTER (WHERE c.gha), MIN(c.id) FILTER (WHERE c.gha),
+                   COUNT(c.id) FILTER (WHERE c.warehouse), MIN(c.id) FILTER (WHERE c.warehouse),
+                   (SELECT rel.company_id
+                      FROM res_partner_company_rel rel
+                      JOIN res_partner company ON company.id = rel.company_id AND company.active
+                     WHERE rel.partner_id = p.id
+                  ORDER BY company.complete_name, company.id DESC
+                     LIMIT 1)
+              FROM res_partner p
+         LEFT JOIN res_partner c ON c.parent_id = p.id AND c.active AND (c.gha OR c.warehouse)
+             WHERE p.id = ANY(%s)
+          GROUP BY p.id
+        """, [missing])
+        for partner_id, order_ref, gha_count, gha_id, warehouse_count, warehouse_id, company_id \
+                in self.env.cr.fetchall():
+            values = {
+                'ref_customer': order_ref or False,
+                'handling_agent_id': gha_id if gha_count == 1 else False,
+                'customer_warehouse_id': warehouse_id if warehouse_count == 1 else False,
+                'delivery_company_id': company_id or False,
+            }
+            if use_cache:
+                self.env.cr.postcommit.add(partial(CUSTOMER_DEFAULTS_CACHE.set, (dbname, partner_id), values))
+            result[partner_id] = dict(values)
+        return result
+
+    @api.depends('name', 'ref')
+    @api.depends_context('show_ref')
     def _compute_display_name(self):
-        super()._compute_display_name()
+        # replaces the commercial name display of base entirely, no super() call
         show_ref = self.env.context.get("show_ref", False)
         for rec in self:
             if show_ref:
@@ -23,11 +133,34 @@ class ResPartner(models.Model):
             else:
                 rec.display_name = rec.name or ''
 
+    @api.model
+    def _search_display_name(self, operator, value):
+        # the shipment form searches the ref and name only, both trigram indexed
+        if self.env.context.get('shipment_name_search') and value and operator in ('ilike', '=ilike', '='):
+            return ['|', ('ref', operator, value), ('complete_name', operator, value)]
+        return super()._search_display_name(operator, value)
+
+    @api.model
+    def name_search(self, name='', domain=None, operator='ilike', limit=100):
+        if not self.env.context.get('shipment_name_search') or self.env.cr.postcommit.data.get(NAME_SEARCH_STALE):
+            return super().name_search(name, domain, operator, limit)
+        key = (
+            self.env.cr.dbname, self.env.uid, self.env.su,
+            tuple(sorted((key, repr(value)) for key, value in self.env.context.items())),
+            name, repr(domain), operator, limit,
+        )
+        result = NAME_SEARCH_CACHE.get(key)
+        if result is None:
+            result = super().name_search(name, domain, operator, limit)
+            # a rolled back transaction never feeds the cache
+            self.env.cr.postcommit.add(partial(NAME_SEARCH_CACHE.set, key, result))
+        return list(result)
+
     @api.constrains('zip', 'country_id')
     def _check_zip_germany(self):
         for rec in self:
             if rec.country_id and rec.country_id.code == 'DE':
-                if not rec.zip or len(rec.zip) != 5 or not rec.zip.isdigit():
+                if not is_valid_zip(rec.zip, 'DE'):
                     raise ValidationError(
                         _("In Germany, the ZIP code must contain exactly 5 digits.")
                     )
@@ -1,8 +1,24 @@
 
-from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+import logging
+import time
+
+import psycopg2
+
+from odoo import models, fields, api, _, Command
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL, split_every
+from collections import defaultdict
 from datetime import datetime, timedelta
+from itertools import repeat
+
+from ..tools.indexes import ensure_managed_indexes
+from ..tools.packing import PackBin, PackItem, pack
+from ..tools.shipment_io import LINE_COLUMNS
+from ..tools.weights import LOADING_METER_WEIGHT
+
+_logger = logging.getLogger(__name__)
 
+TOTALS_FIELDS = ['total_quantity', 'total_weight', 'total_volume', 'total_chargeable_weight', 'total_price']
 
 
 class Shipment(models.Model):
@@ -42,6 +58,10 @@ class Shipment(models.Model):
     zip_code = fields.Many2one('postal.code',string="ZIP code",tracking=True,required=True)
     city = fields.Char(string="City",related="zip_code.city",store=False,eadonly=True,required=True)
     postal_code_code = fields.Char(string="Postal Code",related="zip_code.code",store=True,readonly=True)
+    distance_interval = fields.Selection(
+        selection=lambda self: self.env['pricing.scale']._fields['distance_interval'].selection,
+        string="Distance interval", tracking=True,
+        help="Tariff distance used to price the lines")
     total_quantity = fields.Integer(string="Total Quantity", compute='_compute_totals', store=True)
     total_weight = fields.Float(string="Total Weight (kg)", compute='_compute_totals', store=True,
                                 digits='Product Unit of Measure')
@@ -84,6 +104,9 @@ class Shipment(models.Model):
     taillift = fields.Boolean(string="Taillift", tracking=True)
     sequence = fields.Char(string="Sequence")
 
+    def init(self):
+        ensure_managed_indexes(self.env, self._table)
+
     def name_get(self):
         result = []
         for rec in self:
@@ -124,26 +147,73 @@ class Shipment(models.Model):
         for rec in self:
             rec.loading_time = f"{rec.loading_time_from:.2f} - {rec.loading_time_to:.2f}"
 
-    @api.depends('line_ids.quantity', 'line_ids.weight', 'line_ids.volume', 'line_ids.price_unit')
+    @api.depends('line_ids.quantity', 'line_ids.weight', 'line_ids.volume', 'line_ids.chargeable_weight',
+                 'line_ids.price_unit')
     def _compute_totals(self):
+        # stored shipments are aggregated in SQL, new records (onchange) in Python
+        totals = self.filtered('id')._read_totals()
         for rec in self:
-            qty = 0
-            weight = 0.0
-            volume = 0.0
-            price = 0.0
-            chargeable_weight = 0.0
-            for line in rec.line_ids:
-                qty += (line.quantity or 0)
-                weight += (line.weight or 0.0)
-                volume += (line.volume or 0.0)
-                chargeable_weight += (line.chargeable_weight or 0.0)
-                price += (line.price_unit or 0.0) * (line.quantity or 0)
+            if rec.id:
+                qty, weight, volume, chargeable_weight, price = totals.get(rec.id, (0, 0.0, 0.0, 0.0, 0.0))
+            else:
+                qty = 0
+                weight = 0.0
+                volume = 0.0
+                price = 0.0
+                chargeable_weight = 0.0
+                for line in rec.line_ids:
+                    qty += (line.quantity or 0)
+                    weight += (line.weight or 0.0)
+                    volume += (line.volume or 0.0)
+                    chargeable_weight += (line.chargeable_weight or 0.0)
+                    price += (line.price_unit or 0.0) * (line.quantity or 0)
             rec.total_quantity = qty
             rec.total_weight = weight
             rec.total_volume = volume
             rec.total_chargeable_weight = chargeable_weight
             rec.total_price = price
 
+    def _read_totals(self):
+        if not self:
+            return {}
+        self.env['shipment.line'].flush_model(
+            ['shipment_id', 'quantity', 'weight', 'volume', 'chargeable_weight', 'price_unit'])
+        self.env.cr.execute("""
+            SELECT shipment_id,
+                   COALESCE(SUM(quantity), 0),
+                   COALESCE(SUM(weight), 0)::float8,
+                   COALESCE(SUM(volume), 0)::float8,
+                   COALESCE(SUM(chargeable_weight), 0)::float8,
+                   COALESCE(SUM(COALESCE(price_unit, 0) * COALESCE(quantity, 0)), 0)::float8
+              FROM shipment_line
+             WHERE shipment_id = ANY(%s)
+          GROUP BY shipment_id
+        """, [self.ids])
+        return {row[0]: row[1:] for row in self.env.cr.fetchall()}
+
+    def _recompute_totals(self):
+        for fname in TOTALS_FIELDS:
+            self.env.add_to_compute(self._fields[fname], self)
+        self.flush_recordset(TOTALS_FIELDS)
+
+    def _defer_totals(self):
+        # recompute the totals of every touched shipment once, when the transaction
+        # is flushed; precommit hooks run after the ORM flush, hence the explicit one
+        pending = self.env.cr.precommit.data.get('shipment_management.deferred_totals')
+        if pending is None:
+            pending = self.env.cr.precommit.data['shipment_management.deferred_totals'] = set()
+            Shipment = self.browse()
+
+            @self.env.cr.precommit.add
+            def _mark_deferred_totals():
+                shipments = Shipment.browse(pending).exists()
+                pending.clear()
+                for fname in TOTALS_FIELDS:
+                    self.env.add_to_compute(Shipment._fields[fname], shipments)
+                shipments.flush_recordset(TOTALS_FIELDS)
+
+        pending.update(self.ids)
+
     @api.depends('spx_status', 'direct', 'security_measurement')
     def _compute_red_folder(self):
         for rec in self:
@@ -169,24 +239,8 @@ class Shipment(models.Model):
     @api.onchange('customer_id')
     def _onchange_customer_id(self):
         if self.customer_id:
-            self.ref_customer = self.customer_id.order_ref
-            partner_ids = self.customer_id.child_ids
-            gha_partner = partner_ids.filtered(lambda p: p.gha)
-            if len(gha_partner) == 1:
-                self.handling_agent_id = gha_partner[0]
-            else:
-                self.handling_agent_id = False
-
-            warehouse_partner = partner_ids.filtered(lambda p: p.warehouse)
-            if len(warehouse_partner) == 1:
-                self.customer_warehouse_id = warehouse_partner[0]
-            else:
-                self.customer_warehouse_id = False
-
-            if self.customer_id.company_ids:
-                self.delivery_company_id = self.customer_id.company_ids[0]
-            else:
-                self.delivery_company_id = False
+            defaults = self.env['res.partner']._get_shipment_defaults(self.customer_id.ids)
+            self.update(defaults.get(self.customer_id.id, {}))
         else:
             self.ref_customer = False
 
@@ -196,10 +250,7 @@ class Shipment(models.Model):
         for rec in self:
             rec.zip_code = False
             if rec.delivery_company_id and rec.delivery_company_id.zip:
-                postal = self.env['postal.code'].search(
-                    [('name', '=', rec.delivery_company_id.zip)],
-                    limit=1
-                )
+                postal = self.env['postal.code'].resolve(rec.delivery_company_id.zip)
                 rec.zip_code = postal.id if postal else False
 
     @api.onchange('spx_status','express')
@@ -223,51 +274,405 @@ class Shipment(models.Model):
         else:
             self.handling_agent_id = False
 
-    def create(self, vals):
-        shipment_type = vals.get("shipment_type") or self.env.context.get("default_shipment_type")
-        company_id = vals.get('company_id') or self.env.company.id
-        if shipment_type == "import":
-            seq_code = "shipment.management.import"
-        else:
-            seq_code = "shipment.management.export"
-        if not vals.get("reference") or vals["reference"] == "New":
-            vals["reference"] = self.env['ir.sequence'].with_company(company_id).next_by_code(seq_code) or "/"
-
-        shipment = super().create(vals)
-        if shipment.customer_id and shipment.delivery_company_id:
-            shipment.customer_id.company_ids |= shipment.delivery_company_id
-        return shipment
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._apply_customer_defaults(vals_list)
+        self._assign_references(vals_list)
+        shipments = super().create(vals_list)
+        shipments._link_delivery_companies()
+        return shipments
+
+    def _apply_customer_defaults(self, vals_list):
+        """ Fill in the values of the customer onchange that ``vals_list`` and
+        the context defaults leave out, with one resolver call for the batch.
+        """
+        customer_ids = {vals['customer_id'] for vals in vals_list if vals.get('customer_id')}
+        if not customer_ids:
+            return vals_list
+        defaults = self.env['res.partner']._get_shipment_defaults(customer_ids)
+        for vals in vals_list:
+            for fname, value in defaults.get(vals.get('customer_id'), {}).items():
+                if fname not in vals and 'default_' + fname not in self.env.context:
+                    vals[fname] = value
+        return vals_list
+
+    def _assign_references(self, vals_list):
+        # reserve one block of references per company and shipment type
+        to_number = defaultdict(list)
+        for vals in vals_list:
+            if not vals.get("reference") or vals["reference"] == "New":
+                shipment_type = vals.get("shipment_type") or self.env.context.get("default_shipment_type")
+                if shipment_type == "import":
+                    seq_code = "shipment.management.import"
+                else:
+                    seq_code = "shipment.management.export"
+                company_id = vals.get('company_id') or self.env.company.id
+                to_number[company_id, seq_code].append(vals)
+        for (company_id, seq_code), group in to_number.items():
+            references = self.env['ir.sequence'].with_company(company_id).next_block_by_code(seq_code, len(group))
+            for vals, reference in zip(group, references or repeat("/")):
+                vals["reference"] = reference
 
     def write(self, vals):
         res = super().write(vals)
-        for rec in self:
-            if rec.customer_id and rec.delivery_company_id:
-                rec.customer_id.company_ids |= rec.delivery_company_id
+        if 'customer_id' in vals or 'delivery_company_id' in vals:
+            self._link_delivery_companies()
         return res
 
+    def _link_delivery_companies(self):
+        # add the missing customer/delivery company pairs with a single insert
+        pairs = {
+            (rec.customer_id.id, rec.delivery_company_id.id)
+            for rec in self
+            if rec.customer_id and rec.delivery_company_id
+        }
+        if not pairs:
+            return
+        self.env['res.partner'].flush_model(['company_ids'])
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO res_partner_company_rel (partner_id, company_id)
+                 SELECT v.partner_id, v.company_id
+                   FROM (VALUES %s) AS v(partner_id, company_id)
+            ON CONFLICT DO NOTHING
+              RETURNING partner_id
+            """,
+            SQL(", ").join(SQL("(%s, %s)", partner_id, company_id) for partner_id, company_id in pairs),
+        ))
+        partners = self.env['res.partner'].browse({row[0] for row in self.env.cr.fetchall()})
+        if partners:
+            partners._invalidate_customer_defaults_cache()
+            partners.invalidate_recordset(['company_ids'])
+            partners.modified(['company_ids'])
+
+    @api.model
+    def import_shipments(self, shipments, chunk_size=500):
+        """ Create shipments and their lines from ``(row number, shipment dict)``
+        pairs, typically read_shipments() over a file, in chunks of
+        ``chunk_size`` shipments. References are resolved once per chunk. A
+        chunk that fails is retried shipment by shipment, so one bad row does
+        not stop the import. Returns the import statistics, with the errors as
+        ``(row number, message)`` pairs.
+        """
+        stats = {'rows': 0, 'created': 0, 'errors': []}
+        start = time.perf_counter()
+        importer = self.with_context(tracking_disable=True, defer_shipment_totals=True)
+        for chunk in split_every(chunk_size, shipments):
+            stats['rows'] += len(chunk)
+            numbers, vals_list = importer._prepare_import_values(chunk, stats['errors'])
+            stats['created'] += importer._create_import_chunk(numbers, vals_list, stats['errors'])
+        stats['duration'] = time.perf_counter() - start
+        stats['rows_per_second'] = stats['rows'] / stats['duration'] if stats['duration'] else 0.0
+        _logger.info("Imported shipments: %s rows (%s created, %s errors) at %.0f rows/s",
+                     stats['rows'], stats['created'], len(stats['errors']), stats['rows_per_second'])
+        return stats
+
+    def _prepare_import_values(self, chunk, errors):
+        # resolve the references of the whole chunk with one query per model
+        Partner = self.env['res.partner']
+        customer_refs = {shipment.get('customer_ref') for _number, shipment in chunk} - {None, ''}
+        customers = {}
+        for partner in Partner.search([('ref', 'in', list(customer_refs))], order='id desc'):
+            customers[partner.ref] = partner.id
+        company_keys = list({shipment.get('delivery_company') for _number, shipment in chunk} - {None, ''})
+        companies = {}
+        matches = Partner.search(['|', ('ref', 'in', company_keys), ('name', 'in', company_keys)], order='id desc')
+        # a reference wins over a name, the oldest partner over newer ones
+        for partner in matches:
+            companies[partner.name] = partner.id
+        for partner in matches:
+            if partner.ref:
+                companies[partner.ref] = partner.id
+        vehicles = {}
+        vehicle_names = list({shipment.get('vehicle') for _number, shipment in chunk} - {None, ''})
+        for vehicle in self.env['shipment.vehicle'].search([('name', 'in', vehicle_names)], order='id desc'):
+            vehicles[vehicle.name] = vehicle.id
+        zips = self.env['postal.code'].resolve_many(
+            {str(shipment['zip']) for _number, shipment in chunk if shipment.get('zip')})
+
+        numbers = []
+        vals_list = []
+        for number, shipment in chunk:
+            try:
+                vals = self._convert_import_shipment(shipment, customers, companies, vehicles, zips)
+            except ValueError as e:
+                errors.append((number, str(e)))
+                continue
+            numbers.append(number)
+            vals_list.append(vals)
+
+        # shipments without ZIP take the one of their delivery company, as in the form
+        self._apply_customer_defaults(vals_list)
+        without_zip = [vals for vals in vals_list if not vals.get('zip_code') and vals.get('delivery_company_id')]
+        if without_zip:
+            company_zips = {
+                partner.id: partner.zip
+                for partner in Partner.browse({vals['delivery_company_id'] for vals in without_zip})
+            }
+            zips = self.env['postal.code'].resolve_many(set(company_zips.values()))
+            for vals in without_zip:
+                vals['zip_code'] = zips.get(company_zips[vals['delivery_company_id']], False)
+
+        valid_numbers = []
+        valid_vals_list = []
+        for number, vals in zip(numbers, vals_list):
+            missing = [
+                label for fname, label in (
+                    ('ref_customer', _("customer reference")),
+                    ('delivery_company_id', _("delivery company")),
+                    ('zip_code', _("ZIP")),
+                )
+                if not vals.get(fname)
+            ]
+            if missing:
+                errors.append((number, _("Missing %s.", ", ".join(missing))))
+                continue
+            valid_numbers.append(number)
+            valid_vals_list.append(vals)
+        return valid_numbers, valid_vals_list
+
+    @api.model
+    def _convert_import_shipment(self, shipment, customers, companies, vehicles, zips):
+        if shipment.get('error'):
+            raise ValueError(shipment['error'])
+        shipment_type = shipment.get('shipment_type') or self.env.context.get('default_shipment_type')
+        if shipment_type not in ('import', 'export'):
+            raise ValueError(_("Shipment type must be 'import' or 'export', not %r.", shipment_type))
+        customer_ref = shipment.get('customer_ref')
+        if customer_ref not in customers:
+            raise ValueError(_("Unknown customer reference %r.", customer_ref))
+        vals = {
+            'shipment_type': shipment_type,
+            'customer_id': customers[customer_ref],
+            'express': _to_bool(shipment.get('express')),
+            'dangerous': _to_bool(shipment.get('dangerous')),
+            'taillift': _to_bool(shipment.get('taillift')),
+            'loading_meter': _to_float(shipment.get('loading_meter'), 'loading_meter'),
+            'lines': [
+                {
+                    'quantity': int(_to_float(line.get('quantity'), 'quantity') or 1),
+                    'weight': _to_float(line.get('weight'), 'weight'),
+                    'length_cm': _to_float(line.get('length_cm'), 'length_cm'),
+                    'width_cm': _to_float(line.get('width_cm'), 'width_cm'),
+                    'height_cm': _to_float(line.get('height_cm'), 'height_cm'),
+                    'price_unit': _to_float(line.get('price_unit'), 'price_unit'),
+                }
+                for line in shipment.get('lines') or ()
+            ],
+        }
+        for key, fname in (('reference', 'reference'), ('ref_customer', 'ref_customer'), ('notes', 'notes')):
+            if shipment.get(key):
+                vals[fname] = str(shipment[key])
+        if shipment.get('spx_status'):
+            if shipment['spx_status'] not in ('secured', 'unsecured'):
+                raise ValueError(_("SPX status must be 'secured' or 'unsecured', not %r.", shipment['spx_status']))
+            vals['spx_status'] = shipment['spx_status']
+        if shipment.get('order_date'):
+            try:
+                vals['order_date'] = fields.Date.to_date(str(shipment['order_date']))
+            except ValueError:
+                raise ValueError(_("Invalid order date %r.", shipment['order_date']))
+        for key, fname, mapping, label in (
+            ('delivery_company', 'delivery_company_id', companies, _("delivery company")),
+            ('vehicle', 'vehicle_id', vehicles, _("vehicle")),
+            ('zip', 'zip_code', zips, _("ZIP")),
+        ):
+            value = shipment.get(key)
+            if value:
+                value = str(value)
+                if value not in mapping:
+                    raise ValueError(_("Unknown %(label)s %(value)r.", label=label, value=value))
+                vals[fname] = mapping[value]
+        return vals
+
+    def _create_import_chunk(self, numbers, vals_list, errors):
+        if not vals_list:
+            return 0
+        try:
+            with self.env.cr.savepoint():
+                self._create_import_shipments(vals_list)
+            return len(vals_list)
+        except (UserError, psycopg2.Error):
+            pass
+        created = 0
+        for number, vals in zip(numbers, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    self._create_import_shipments([vals])
+                created += 1
+            except (UserError, psycopg2.Error) as e:
+                errors.append((number, str(e.args[0] if isinstance(e, UserError) else e).strip()))
+        return created
+
+    def _create_import_shipments(self, vals_list):
+        shipments = self.create([
+            {fname: value for fname, value in vals.items() if fname != 'lines'}
+            for vals in vals_list
+        ])
+        line_vals_list = [
+            dict(line, shipment_id=shipment.id)
+            for shipment, vals in zip(shipments, vals_list)
+            for line in vals['lines']
+        ]
+        ShipmentLine = self.env['shipment.line']
+        ShipmentLine.create(ShipmentLine._prepare_weight_values(line_vals_list))
+        return shipments
+
+    def _iter_export(self, batch_size=1000):
+        """ Yield the shipments as dicts of read_shipments()'s format, reading
+        ``batch_size`` shipments at a time and dropping them from the cache
+        afterwards, so exports of any size run in bounded memory.
+        """
+        for ids in split_every(batch_size, self.ids):
+            shipments = self.browse(ids)
+            shipments.line_ids.fetch(LINE_COLUMNS)
+            for shipment in shipments:
+                yield {
+                    'reference': shipment.reference,
+                    'shipment_type': shipment.shipment_type,
+                    'customer_ref': shipment.customer_id.ref or '',
+                    'ref_customer': shipment.ref_customer or '',
+                    'delivery_company': shipment.delivery_company_id.ref or shipment.delivery_company_id.name or '',
+                    'zip': shipment.zip_code.name or '',
+                    'order_date': fields.Date.to_string(shipment.order_date) or '',
+                    'spx_status': shipment.spx_status or '',
+                    'express': int(shipment.express),
+                    'dangerous': int(shipment.dangerous),
+                    'taillift': int(shipment.taillift),
+                    'loading_meter': shipment.loading_meter,
+                    'vehicle': shipment.vehicle_id.name or '',
+                    'notes': shipment.notes or '',
+                    'lines': [
+                        {column: line[column] for column in LINE_COLUMNS}
+                        for line in shipment.line_ids
+                    ],
+                }
+            self.env.invalidate_all()
+
+    def _set_state(self, state):
+        # one UPDATE for the whole batch, tracking messages created in one go
+        shipments = self.filtered(lambda rec: rec.state != state)
+        if not shipments:
+            return True
+        previous_states = {rec.id: rec.state for rec in shipments}
+        shipments.with_context(tracking_disable=True).write({'state': state})
+        shipments._log_state_tracking(previous_states, state)
+        return True
+
+    def _log_state_tracking(self, previous_states, state):
+        if self.env.context.get('tracking_disable') or not self:
+            return
+        col_info = self.fields_get(['state'], attributes=('string', 'type', 'selection'))['state']
+        TrackingValue = self.env['mail.tracking.value']
+        author_id, email_from = self._message_compute_author()
+        subtype_id = self.env['ir.model.data']._xmlid_to_res_id('mail.mt_note')
+        self.sudo()._message_create([{
+            'author_id': author_id,
+            'email_from': email_from,
+            'message_type': 'notification',
+            'model': self._name,
+            'res_id': rec.id,
+            'subtype_id': subtype_id,
+            'tracking_value_ids': [Command.create(
+                TrackingValue._create_tracking_values(previous_states[rec.id], state, 'state', col_info, rec)
+            )],
+        } for rec in self])
 
-    def action_confirm(self):
-        for rec in self:
-            if not rec.line_ids:
-                raise ValidationError(_("You must add at least one shipment line before confirming."))
-
-            for line in rec.line_ids:
-                if line.chargeable_weight <= 0 or line.quantity <= 0:
-                    raise ValidationError(_("Chargeable Weight and Quantity must be greater than 0."))
 
-            rec.state = 'confirmed'
+    def action_confirm(self):
+        # confirmed shipments are left as they are, later states cannot go back
+        blocked = self.filtered(lambda rec: rec.state not in ('draft', 'confirmed'))
+        if blocked:
+            states = dict(self._fields['state']._description_selection(self.env))
+            raise UserError(_("Only draft shipments can be confirmed:\n%s", "\n".join(
+                "%s (%s)" % (rec.reference, states[rec.state]) for rec in blocked)))
+        drafts = self.filtered(lambda rec: rec.state == 'draft')
+        errors = drafts._get_confirm_errors()
+        if errors:
+            raise ValidationError(_("The following shipments cannot be confirmed:\n%s", "\n".join(errors)))
+        return drafts._set_state('confirmed')
+
+    def _get_confirm_errors(self):
+        # shipments without lines, or with lines that have a non-positive
+        # chargeable weight or quantity, all found with one query
+        if not self:
+            return []
+        self.env['shipment.line'].flush_model(['shipment_id', 'quantity', 'chargeable_weight'])
+        self.env.cr.execute("""
+            SELECT s.id, COUNT(l.id),
+                   COUNT(l.id) FILTER (WHERE COALESCE(l.chargeable_weight, 0) <= 0 OR COALESCE(l.quantity, 0) <= 0)
+              FROM shipment_management s
+         LEFT JOIN shipment_line l ON l.shipment_id = s.id
+             WHERE s.id = ANY(%s)
+          GROUP BY s.id
+            HAVING COUNT(l.id) = 0
+                OR COUNT(l.id) FILTER (WHERE COALESCE(l.chargeable_weight, 0) <= 0
+                                          OR COALESCE(l.quantity, 0) <= 0) > 0
+          ORDER BY s.id
+        """, [self.ids])
+        rows = self.env.cr.fetchall()
+        references = {rec.id: rec.reference for rec in self.browse([row[0] for row in rows])}
+        errors = []
+        for shipment_id, line_count, invalid_count in rows:
+            reference = references[shipment_id]
+            if not line_count:
+                errors.append(_("%s: add at least one shipment line.", reference))
+            else:
+                errors.append(_("%(reference)s: %(count)s line(s) without a positive chargeable weight and quantity.",
+                                reference=reference, count=invalid_count))
+        return errors
+
+    @api.model
+    def _assign_vehicles(self, date, vehicles):
+        """ Pack the confirmed shipments of ``date`` that have no vehicle yet
+        onto ``vehicles``, on top of the shipments already assigned to them.
+        Returns the shipments that did not fit and the {vehicle id: Load} of
+        every vehicle.
+        """
+        shipments = self.search([('state', '=', 'confirmed'), ('order_date', '=', date)])
+        bins = [
+            PackBin(vehicle.id, vehicle.max_weight, vehicle.max_loading_meter, vehicle.secured, vehicle.express)
+            for vehicle in vehicles
+        ]
+        preloaded = [(rec._get_pack_item(), rec.vehicle_id.id) for rec in shipments if rec.vehicle_id]
+        items = [rec._get_pack_item() for rec in shipments if not rec.vehicle_id]
+        assignment, unplaced, loads = pack(items, bins, preloaded)
+
+        # one write per vehicle
+        shipment_ids_by_vehicle = defaultdict(list)
+        for shipment_id, vehicle_id in assignment.items():
+            shipment_ids_by_vehicle[vehicle_id].append(shipment_id)
+        for vehicle_id, shipment_ids in shipment_ids_by_vehicle.items():
+            self.browse(shipment_ids).write({'vehicle_id': vehicle_id})
+        return self.browse(unplaced), loads
+
+    def _get_pack_item(self):
+        # without a loading meter, the floor space follows from the chargeable weight
+        chargeable_weight = self.total_chargeable_weight or 0.0
+        return PackItem(
+            self.id,
+            chargeable_weight,
+            self.loading_meter or chargeable_weight / LOADING_METER_WEIGHT,
+            self.spx_status == 'secured',
+            self.express,
+            self.zip_code.zone,
+        )
+
+    def action_apply_tariff(self):
+        self.line_ids._reprice()
+        return True
 
     def action_pick(self):
-        self.write({'state': 'picked'})
+        return self._set_state('picked')
 
     def action_deliver(self):
-        self.write({'state': 'delivered'})
+        return self._set_state('delivered')
 
     def action_cancel(self):
-        self.write({'state': 'cancelled'})
+        return self._set_state('cancelled')
 
     def action_reset_to_draft(self):
-        self.write({'state': 'draft'})
+        return self._set_state('draft')
 
     def action_open_shipment(self):
         self.ensure_one()
@@ -279,7 +684,16 @@ class Shipment(models.Model):
         }
 
 
+def _to_float(value, label):
+    if value in (None, ''):
+        return 0.0
+    try:
+        return float(str(value).replace(',', '.')) if isinstance(value, str) else float(value)
+    except ValueError:
+        raise ValueError(_("Invalid number %(value)r for %(label)s.", value=value, label=label))
 
 
-
-
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'y', 'x')
+    return bool(value)
@@ -1,6 +1,13 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+from .shipment import TOTALS_FIELDS
+from ..tools.indexes import ensure_managed_indexes
+from ..tools.weights import compute_chargeable_weights, compute_line_weights, compute_volumes, \
+    compute_volumetric_weights
+
+# shipments whose lines follow tariff changes
+REPRICE_STATES = ('draft', 'confirmed')
 
 
 class ShipmentLine(models.Model):
@@ -18,6 +25,46 @@ class ShipmentLine(models.Model):
     chargeable_weight = fields.Float(string="Chargeable Weight (kg)",compute="_compute_chargeable_weight",store=True,
                                      readonly=False)
     volumetric_weight = fields.Float(string="Volumetric Weight (kg)", compute="_compute_chargeable_weight",store=True)
+    pricing_scale_id = fields.Many2one('pricing.scale', string="Tariff cell", index='btree_not_null',
+                                       readonly=True, copy=False, ondelete='set null')
+    reprice_needed = fields.Boolean(string="Reprice needed", copy=False)
+
+    def init(self):
+        ensure_managed_indexes(self.env, self._table)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if not self.env.context.get('defer_shipment_totals'):
+            return super().create(vals_list)
+        shipments = self.env['shipment.management'].browse(
+            {vals['shipment_id'] for vals in vals_list if vals.get('shipment_id')})
+        with self._protect_totals(shipments):
+            lines = super().create(vals_list)
+        (shipments | lines.shipment_id)._defer_totals()
+        return lines
+
+    def write(self, vals):
+        if not self.env.context.get('defer_shipment_totals'):
+            return super().write(vals)
+        shipments = self.shipment_id
+        if vals.get('shipment_id'):
+            shipments |= shipments.browse(vals['shipment_id'])
+        with self._protect_totals(shipments):
+            res = super().write(vals)
+        shipments._defer_totals()
+        return res
+
+    def unlink(self):
+        if not self.env.context.get('defer_shipment_totals'):
+            return super().unlink()
+        shipments = self.shipment_id
+        with self._protect_totals(shipments):
+            res = super().unlink()
+        shipments._defer_totals()
+        return res
+
+    def _protect_totals(self, shipments):
+        return self.env.protecting([shipments._fields[fname] for fname in TOTALS_FIELDS], shipments)
 
     @api.constrains('quantity')
     def _check_quantity_positive(self):
@@ -27,21 +74,66 @@ class ShipmentLine(models.Model):
 
     @api.depends('length_cm', 'width_cm', 'height_cm')
     def _compute_volume(self):
-        for rec in self:
-            if rec.length_cm and rec.width_cm and rec.height_cm:
-                rec.volume = (rec.length_cm/100 * rec.width_cm /100 * rec.height_cm/100)
-            else:
-                rec.volume = 0.0
+        volumes = compute_volumes(self.mapped('length_cm'), self.mapped('width_cm'), self.mapped('height_cm'))
+        for rec, volume in zip(self, volumes):
+            rec.volume = volume
 
     @api.depends('length_cm', 'width_cm', 'height_cm', 'weight','volume','shipment_id.loading_meter')
     def _compute_chargeable_weight(self):
-        for rec in self:
-            volumetric_weight = 0.0
-            if rec.length_cm and rec.width_cm and rec.height_cm:
-                volumetric_weight = (rec.length_cm * rec.width_cm * rec.height_cm) / 6000
-            elif rec.volume:
-                volumetric_weight = rec.volume * 1000000 / 6000
-            loading_meter = rec.shipment_id.loading_meter or 0
-            l_weight = loading_meter * 700
+        volumetric_weights = compute_volumetric_weights(
+            self.mapped('length_cm'), self.mapped('width_cm'), self.mapped('height_cm'), self.mapped('volume'))
+        chargeable_weights = compute_chargeable_weights(
+            self.mapped('weight'), volumetric_weights, [rec.shipment_id.loading_meter for rec in self])
+        for rec, volumetric_weight, chargeable_weight in zip(self, volumetric_weights, chargeable_weights):
             rec.volumetric_weight = volumetric_weight
-            rec.chargeable_weight = max(rec.weight or 0.0, volumetric_weight, l_weight)
+            rec.chargeable_weight = chargeable_weight
+
+    @api.model
+    def _prepare_weight_values(self, vals_list):
+        """ Fill volume, volumetric_weight and chargeable_weight in create values
+        in one pass, so bulk imports skip the per-line computes.
+        """
+        shipment_ids = {vals['shipment_id'] for vals in vals_list if vals.get('shipment_id')}
+        loading_meters = {
+            shipment.id: shipment.loading_meter
+            for shipment in self.env['shipment.management'].browse(shipment_ids)
+        }
+        columns = compute_line_weights(
+            [vals.get('length_cm') or 0.0 for vals in vals_list],
+            [vals.get('width_cm') or 0.0 for vals in vals_list],
+            [vals.get('height_cm') or 0.0 for vals in vals_list],
+            [vals.get('volume') or 0.0 for vals in vals_list],
+            [vals.get('weight') or 0.0 for vals in vals_list],
+            [loading_meters.get(vals.get('shipment_id'), 0.0) for vals in vals_list],
+        )
+        for vals, volume, volumetric_weight, chargeable_weight in zip(vals_list, *columns):
+            vals.setdefault('volume', volume)
+            vals['volumetric_weight'] = volumetric_weight
+            vals.setdefault('chargeable_weight', chargeable_weight)
+        return vals_list
+
+    @api.model
+    def _mark_reprice(self, cell_ids):
+        self.flush_model(['shipment_id', 'pricing_scale_id', 'reprice_needed'])
+        self.env['shipment.management'].flush_model(['state'])
+        self.env.cr.execute("""
+            UPDATE shipment_line line
+               SET reprice_needed = true
+              FROM shipment_management shipment
+             WHERE shipment.id = line.shipment_id
+               AND shipment.state IN %s
+               AND line.pricing_scale_id = ANY(%s)
+               AND line.reprice_needed IS NOT TRUE
+         RETURNING line.id
+        """, [REPRICE_STATES, list(cell_ids)])
+        line_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.browse(line_ids).invalidate_recordset(['reprice_needed'])
+        return len(line_ids)
+
+    def _reprice(self):
+        """ Price the lines of open shipments from the tariff grid, the totals
+        of each shipment are recomputed once.
+        """
+        lines = self.filtered(lambda line: line.shipment_id.state in REPRICE_STATES)
+        self.env['pricing.scale']._price_lines(lines.with_context(defer_shipment_totals=True), 'quantity')
+        self.filtered('reprice_needed').reprice_needed = False
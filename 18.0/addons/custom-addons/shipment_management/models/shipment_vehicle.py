@@ -7,4 +7,9 @@ class ShipmentVehicle(models.Model):
     name = fields.Char(string="Vehicle Name", required=True)
     secured = fields.Boolean(string="Secured")
     express = fields.Boolean(string="Express")
-    category_ids = fields.Many2many('shipment.vehicle.category',string="Tags")
\ No newline at end of file
+    category_ids = fields.Many2many('shipment.vehicle.category',string="Tags")
+    available = fields.Boolean(string="Available", default=True,
+                               help="Used by the automatic vehicle assignment")
+    max_weight = fields.Float(string="Max weight (kg)", default=24000, help="0 means no limit")
+    max_loading_meter = fields.Float(string="Max loading meter", default=13.6, digits=(16, 1),
+                                     help="0 means no limit")
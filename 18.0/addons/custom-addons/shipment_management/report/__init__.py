@@ -0,0 +1 @@
+from . import shipment_report
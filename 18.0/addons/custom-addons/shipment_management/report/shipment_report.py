@@ -0,0 +1,85 @@
+import logging
+import time
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class ShipmentReport(models.Model):
+    _name = 'shipment.report'
+    _description = "Shipment Analysis"
+    _auto = False
+    _order = 'date desc'
+    _rec_name = 'date'
+
+    date = fields.Date(string="Order Date", readonly=True)
+    customer_id = fields.Many2one('res.partner', string="Customer", readonly=True)
+    zone = fields.Selection([("1", "1"), ("2", "2")], string="Zone", readonly=True)
+    vehicle_id = fields.Many2one('shipment.vehicle', string="Vehicle", readonly=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('confirmed', 'Confirmed'),
+        ('picked', 'Picked'),
+        ('delivered', 'Delivered'),
+        ('cancelled', 'Cancelled'),
+    ], string="Status", readonly=True)
+    shipment_type = fields.Selection([("import", "Import"), ("export", "Export")], string="Shipment Type",
+                                     readonly=True)
+    company_id = fields.Many2one('res.company', string="Company", readonly=True)
+    shipment_count = fields.Integer(string="# Shipments", readonly=True)
+    total_quantity = fields.Integer(string="Total Quantity", readonly=True)
+    total_weight = fields.Float(string="Total Weight (kg)", readonly=True, digits='Product Unit of Measure')
+    total_volume = fields.Float(string="Total Volume (m³)", readonly=True, digits=(16, 3))
+    total_chargeable_weight = fields.Float(string="Chargeable weight", readonly=True,
+                                           digits='Product Unit of Measure')
+    total_price = fields.Float(string="Total Price", readonly=True, digits="Product Price")
+
+    def _query(self):
+        # one row per day, customer, zone, vehicle, state, type and company,
+        # built from the stored shipment totals so shipment_line is never read;
+        # the smallest shipment id of the group is a stable row id
+        return SQL("""
+            SELECT MIN(s.id) AS id,
+                   s.order_date AS date,
+                   s.customer_id,
+                   pc.zone,
+                   s.vehicle_id,
+                   s.state,
+                   s.shipment_type,
+                   s.company_id,
+                   COUNT(*) AS shipment_count,
+                   SUM(COALESCE(s.total_quantity, 0)) AS total_quantity,
+                   SUM(COALESCE(s.total_weight, 0)) AS total_weight,
+                   SUM(COALESCE(s.total_volume, 0)) AS total_volume,
+                   SUM(COALESCE(s.total_chargeable_weight, 0)) AS total_chargeable_weight,
+                   SUM(COALESCE(s.total_price, 0)) AS total_price
+              FROM shipment_management s
+         LEFT JOIN postal_code pc ON pc.id = s.zip_code
+          GROUP BY s.order_date, s.customer_id, pc.zone, s.vehicle_id, s.state, s.shipment_type, s.company_id
+        """)
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("DROP VIEW IF EXISTS shipment_report CASCADE")
+        cr.execute("DROP MATERIALIZED VIEW IF EXISTS shipment_report CASCADE")
+        cr.execute(SQL("CREATE MATERIALIZED VIEW shipment_report AS (%s)", self._query()))
+        # REFRESH ... CONCURRENTLY needs a unique index without predicate
+        cr.execute("CREATE UNIQUE INDEX shipment_report_id_uniq ON shipment_report (id)")
+        cr.execute("CREATE INDEX shipment_report_date_state_index ON shipment_report (date, state)")
+        cr.execute("CREATE INDEX shipment_report_customer_date_index ON shipment_report (customer_id, date)")
+        cr.execute("CREATE INDEX shipment_report_vehicle_date_index ON shipment_report (vehicle_id, date)")
+
+    @api.model
+    def _refresh(self):
+        # readers keep seeing the previous snapshot while it is rebuilt
+        self.env['shipment.management'].flush_model()
+        self.env.cr.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY shipment_report")
+        self.env.invalidate_all()
+
+    @api.model
+    def _cron_refresh(self):
+        start = time.monotonic()
+        self._refresh()
+        _logger.info("shipment_report refreshed in %.2fs", time.monotonic() - start)
@@ -0,0 +1,12 @@
+from . import test_customer_defaults
+from . import test_partner_name_search
+from . import test_postal_code_import
+from . import test_postal_code_search
+from . import test_repricing
+from . import test_shipment_benchmark
+from . import test_shipment_confirm
+from . import test_shipment_import
+from . import test_shipment_reference
+from . import test_shipment_report
+from . import test_shipment_totals
+from . import test_vehicle_assignment
@@ -0,0 +1,21 @@
+from odoo.tests import TransactionCase
+
+
+class ShipmentCommon(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.customer = cls.env['res.partner'].create({'name': 'Customer', 'ref': 'REF-CUST'})
+        cls.delivery_company = cls.env['res.partner'].create({'name': 'Delivery company'})
+        cls.postal_code = cls.env['postal.code'].create({'name': '60549', 'city': 'Frankfurt'})
+
+    @classmethod
+    def _shipment_vals(cls, **values):
+        return dict({
+            'shipment_type': 'export',
+            'customer_id': cls.customer.id,
+            'ref_customer': 'ORDER',
+            'delivery_company_id': cls.delivery_company.id,
+            'zip_code': cls.postal_code.id,
+        }, **values)
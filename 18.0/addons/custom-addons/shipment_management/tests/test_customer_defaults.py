@@ -0,0 +1,75 @@
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+from ..models.res_partner import CUSTOMER_DEFAULTS_CACHE
+
+
+@tagged('post_install', '-at_install')
+class TestCustomerDefaults(ShipmentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Partner = cls.env['res.partner']
+        cls.delivery_company = Partner.create({'name': 'A Delivery'})
+        cls.other_company = Partner.create({'name': 'B Delivery'})
+        cls.customer = Partner.create({
+            'name': 'Forwarder',
+            'ref': 'FWD',
+            'order_ref': 'PO-1',
+            'company_ids': [(6, 0, (cls.delivery_company | cls.other_company).ids)],
+        })
+        cls.gha = Partner.create({'name': 'GHA', 'parent_id': cls.customer.id, 'gha': True})
+        Partner.create([
+            {'name': 'Warehouse %s' % index, 'parent_id': cls.customer.id, 'warehouse': True}
+            for index in range(2)
+        ] + [
+            {'name': 'Contact %s' % index, 'parent_id': cls.customer.id}
+            for index in range(50)
+        ])
+
+    def setUp(self):
+        super().setUp()
+        # start from committed fixtures: drop the invalidation of setUpClass
+        self.env.cr.postcommit.clear()
+        CUSTOMER_DEFAULTS_CACHE.clear()
+
+    def test_resolver(self):
+        expected = {
+            'ref_customer': 'PO-1',
+            'handling_agent_id': self.gha.id,
+            'customer_warehouse_id': False,
+            'delivery_company_id': self.delivery_company.id,
+        }
+        self.env.flush_all()
+        with self.assertQueryCount(1):
+            defaults = self.env['res.partner']._get_shipment_defaults([self.customer.id])
+        self.assertEqual(defaults, {self.customer.id: expected})
+        # values are cached once the transaction commits
+        self.assertFalse(len(CUSTOMER_DEFAULTS_CACHE))
+        self.env.cr.postcommit.run()
+        with self.assertQueryCount(0):
+            self.env['res.partner']._get_shipment_defaults([self.customer.id])
+
+        # a change bypasses the cache in its transaction and clears it on commit
+        self.gha.gha = False
+        self.assertFalse(
+            self.env['res.partner']._get_shipment_defaults([self.customer.id])[self.customer.id]['handling_agent_id'])
+        self.assertTrue(len(CUSTOMER_DEFAULTS_CACHE))
+        self.env.cr.postcommit.run()
+        self.assertFalse(len(CUSTOMER_DEFAULTS_CACHE))
+
+    def test_create_fills_missing_values(self):
+        shipments = self.env['shipment.management'].create([{
+            'shipment_type': 'export',
+            'customer_id': self.customer.id,
+            'zip_code': self.postal_code.id,
+        }, self._shipment_vals(
+            ref_customer='MANUAL',
+            handling_agent_id=False,
+            delivery_company_id=self.other_company.id,
+        )])
+        self.assertEqual(shipments.mapped('ref_customer'), ['PO-1', 'MANUAL'])
+        self.assertEqual(shipments[0].handling_agent_id, self.gha)
+        self.assertFalse(shipments[1].handling_agent_id)
+        self.assertEqual(shipments.delivery_company_id, self.delivery_company | self.other_company)
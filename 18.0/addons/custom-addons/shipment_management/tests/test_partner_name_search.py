@@ -0,0 +1,54 @@
+from odoo.tests import TransactionCase, tagged
+
+from ..models.res_partner import NAME_SEARCH_CACHE
+
+
+@tagged('post_install', '-at_install')
+class TestPartnerNameSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env['res.partner'].create({'name': 'Spedition Rhein', 'is_company': True})
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Main Logistik',
+            'ref': 'C-4711',
+            'parent_id': cls.company.id,
+        })
+
+    def setUp(self):
+        super().setUp()
+        # start from committed fixtures: drop the invalidation of setUpClass
+        self.env.cr.postcommit.clear()
+        NAME_SEARCH_CACHE.clear()
+
+    def test_display_name(self):
+        self.assertEqual(self.customer.display_name, 'Main Logistik')
+        self.assertEqual(self.customer.with_context(show_ref=True).display_name, 'C-4711')
+        self.customer.ref = False
+        self.assertEqual(self.customer.with_context(show_ref=True).display_name, 'Main Logistik')
+
+    def test_shipment_name_search_cache(self):
+        Partner = self.env['res.partner'].with_context(show_ref=True, shipment_name_search=True)
+        result = Partner.name_search('4711', [('ref', '!=', False)])
+        self.assertEqual(result, [(self.customer.id, 'C-4711')])
+        self.assertEqual(Partner.name_search('logistik', [('ref', '!=', False)]), [(self.customer.id, 'C-4711')])
+        # results are cached once the transaction commits
+        self.assertFalse(len(NAME_SEARCH_CACHE))
+        self.env.cr.postcommit.run()
+
+        with self.assertQueryCount(0):
+            Partner.name_search('4711', [('ref', '!=', False)])
+
+        # another context has its own entry
+        self.assertEqual(
+            Partner.with_context(show_ref=False).name_search('4711', [('ref', '!=', False)]),
+            [(self.customer.id, 'Main Logistik')],
+        )
+
+        # a change bypasses the cache in its transaction and clears it on commit
+        self.customer.ref = 'C-4712'
+        self.assertFalse(Partner.name_search('4711', [('ref', '!=', False)]))
+        self.assertTrue(len(NAME_SEARCH_CACHE))
+        self.env.cr.postcommit.run()
+        self.assertFalse(len(NAME_SEARCH_CACHE))
@@ -0,0 +1,32 @@
+from odoo.exceptions import ValidationError
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPostalCodeImport(TransactionCase):
+
+    def test_import_rows(self):
+        germany, austria = self.env.ref('base.de'), self.env.ref('base.at')
+        stats = self.env['postal.code'].import_rows([
+            {'country_code': 'DE', 'name': '60549', 'city': 'Frankfurt'},
+            {'country_code': 'AT', 'name': '1010', 'city': 'Wien'},
+            {'country_code': 'DE', 'name': '60549', 'city': 'Frankfurt', 'code': 'FRA'},
+            {'name': '65428', 'city': 'Rüsselsheim'},
+            {'country_code': 'DE', 'name': '1010', 'city': 'Nowhere'},
+            {'country_code': 'XX', 'name': '12345', 'city': 'Unknown'},
+        ], country=germany)
+        self.assertEqual(
+            {key: stats[key] for key in ('rows', 'inserted', 'updated', 'skipped', 'duplicates')},
+            {'rows': 6, 'inserted': 3, 'updated': 0, 'skipped': 2, 'duplicates': 1},
+        )
+        codes = self.env['postal.code'].search([('name', 'in', ['60549', '1010', '65428'])])
+        self.assertEqual(
+            sorted((code.country_id, code.name, code.code or '') for code in codes),
+            sorted([(germany, '60549', 'FRA'), (austria, '1010', ''), (germany, '65428', '')]),
+        )
+
+    def test_duplicate_is_refused(self):
+        values = {'name': '60549', 'city': 'Frankfurt', 'country_id': self.env.ref('base.de').id}
+        self.env['postal.code'].create(values)
+        with self.assertRaises(ValidationError):
+            self.env['postal.code'].create(values)
@@ -0,0 +1,31 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPostalCodeSearch(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.codes = cls.env['postal.code'].create([
+            {'name': '60549', 'city': 'Frankfurt'},
+            {'name': '65428', 'city': 'Rüsselsheim'},
+            {'name': '16054', 'city': 'Elsewhere'},
+        ])
+
+    def test_name_search(self):
+        PostalCode = self.env['postal.code']
+        # ilike keeps its substring semantics by default
+        self.assertEqual({code_id for code_id, _name in PostalCode.name_search('0549')} & set(self.codes.ids),
+                         set(self.codes[0].ids))
+        self.assertEqual({code_id for code_id, _name in PostalCode.name_search('6054')} & set(self.codes.ids),
+                         set((self.codes[0] | self.codes[2]).ids))
+        # the prefix fast path is opt-in
+        result = PostalCode.with_context(zip_prefix_search=True).name_search('6054')
+        self.assertEqual({code_id for code_id, _name in result} & set(self.codes.ids), set(self.codes[0].ids))
+
+    def test_resolve_in_transaction(self):
+        # codes created in the current transaction resolve before the commit
+        self.assertEqual(self.env['postal.code'].resolve('65428'), self.codes[1])
+        code = self.env['postal.code'].create({'name': '99998', 'city': 'New'})
+        self.assertEqual(self.env['postal.code'].resolve('99998'), code)
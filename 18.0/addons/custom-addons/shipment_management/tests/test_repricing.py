@@ -0,0 +1,68 @@
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRepricing(ShipmentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.PricingScale = cls.env['pricing.scale']
+        cls.PricingScale.load_tariff_matrix([
+            {'distance_interval': '1', 'max_height': '1', 'weight_kg': 1000, 'cost': 100.0},
+            {'distance_interval': '1', 'max_height': '2', 'weight_kg': 1500, 'cost': 150.0},
+        ])
+        cls.cell_1000, cls.cell_1500 = [
+            cls.PricingScale.search([('distance_interval', '=', '1'), ('weight_kg', '=', weight)], limit=1)
+            for weight in (1000, 1500)
+        ]
+        cls.shipments = cls.env['shipment.management'].create([cls._shipment_vals(
+            ref_customer='ORDER-%s' % index,
+            distance_interval='1',
+            line_ids=[
+                {'quantity': 2, 'weight': 800},
+                {'quantity': 1, 'weight': 1200},
+            ],
+        ) for index in range(3)])
+        cls.shipments.action_apply_tariff()
+
+    def _stored_total_prices(self):
+        self.env.cr.flush()
+        self.env.cr.execute(
+            "SELECT total_price::float8 FROM shipment_management WHERE id = ANY(%s) ORDER BY id",
+            [self.shipments.ids],
+        )
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    def test_apply_tariff(self):
+        lines = self.shipments[0].line_ids
+        self.assertEqual(lines.pricing_scale_id, self.cell_1000 | self.cell_1500)
+        self.assertEqual(lines.mapped('price_unit'), [50.0, 150.0])
+        self.assertEqual(self._stored_total_prices(), [250.0, 250.0, 250.0])
+
+    def test_reprice_open_lines(self):
+        delivered = self.shipments[2]
+        delivered.state = 'delivered'
+
+        self.cell_1000.cost = 120.0
+        lines = self.shipments.line_ids
+        self.assertEqual(
+            lines.filtered('reprice_needed'),
+            (self.shipments[0] | self.shipments[1]).line_ids.filtered(lambda line: line.weight == 800),
+        )
+
+        self.PricingScale._cron_reprice_lines(batch_size=1)
+        self.assertEqual(len(lines.filtered('reprice_needed')), 1)
+        self.PricingScale._cron_reprice_lines()
+        self.assertFalse(lines.filtered('reprice_needed'))
+        # totals are recomputed once per shipment and written before the commit
+        self.assertEqual(self._stored_total_prices(), [270.0, 270.0, 250.0])
+
+    def test_new_cell_takes_lines(self):
+        self.PricingScale.create({'distance_interval': '1', 'max_height': '1', 'weight_kg': 1200, 'cost': 130.0})
+        self.PricingScale._cron_reprice_lines()
+        line = self.shipments[0].line_ids.filtered(lambda line: line.weight == 1200)
+        self.assertEqual(line.pricing_scale_id.weight_kg, 1200)
+        self.assertEqual(line.price_unit, 130.0)
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from lxml import etree
+
+from odoo import Command
+from odoo.tests import TransactionCase, tagged
+
+_logger = logging.getLogger(__name__)
+
+# SHIPMENT_BENCHMARK_SCALE=1 generates 10k shipments of 20 lines, the default
+# keeps the suite quick enough for a regular test run.
+# SHIPMENT_BENCHMARK_OUTPUT=/path/results.json writes the measurements.
+SCALE = float(os.environ.get('SHIPMENT_BENCHMARK_SCALE') or 0.01)
+OUTPUT = os.environ.get('SHIPMENT_BENCHMARK_OUTPUT')
+LINES_PER_SHIPMENT = 20
+
+
+@tagged('post_install', '-at_install', 'shipment_benchmark')
+class TestShipmentBenchmark(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Shipment = cls.env['shipment.management']
+        cls.results = {}
+        cls.random = random.Random(42)
+        cls.shipment_count = max(10, int(10000 * SCALE))
+
+        germany = cls.env.ref('base.de')
+        cls.postal_codes = cls.env['postal.code'].create([{
+            'name': '%05d' % (10000 + index * 7),
+            'city': 'City %s' % index,
+            'country_id': germany.id,
+        } for index in range(max(50, int(8000 * SCALE)))])
+
+        Partner = cls.env['res.partner']
+        cls.delivery_companies = Partner.create([{
+            'name': 'Delivery company %s' % index,
+            'is_company': True,
+            'zip': postal_code.name,
+            'country_id': germany.id,
+        } for index, postal_code in enumerate(cls.postal_codes[:max(5, int(1000 * SCALE))])])
+        cls.customers = Partner.create([{
+            'name': 'Customer %s' % index,
+            'is_company': True,
+            'ref': 'C%05d' % index,
+            'order_ref': 'ORD-%s' % index,
+        } for index in range(max(5, int(500 * SCALE)))])
+        Partner.create([{
+            'name': '%s %s' % (kind, customer.name),
+            'parent_id': customer.id,
+            'type': 'delivery',
+            kind: True,
+        } for customer in cls.customers for kind in ('gha', 'warehouse')])
+
+        cls.shipments = cls.Shipment.create(cls._shipment_vals_list(cls.shipment_count))
+        cls.env.flush_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        if OUTPUT and cls.results:
+            with open(OUTPUT, 'w') as stream:
+                json.dump({
+                    'scale': SCALE,
+                    'shipments': cls.shipment_count,
+                    'lines_per_shipment': LINES_PER_SHIPMENT,
+                    'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'results': cls.results,
+                }, stream, indent=2, sort_keys=True)
+            _logger.info("Shipment benchmark results written to %s", OUTPUT)
+        super().tearDownClass()
+
+    @classmethod
+    def _shipment_vals_list(cls, count):
+        rnd = cls.random
+        vals_list = []
+        for index in range(count):
+            customer = cls.customers[index % len(cls.customers)]
+            company = cls.delivery_companies[rnd.randrange(len(cls.delivery_companies))]
+            vals_list.append({
+                'shipment_type': 'import' if index % 2 else 'export',
+                'customer_id': customer.id,
+                'ref_customer': customer.order_ref,
+                'delivery_company_id': company.id,
+                'handling_agent_id': customer.child_ids.filtered('gha')[:1].id,
+                'customer_warehouse_id': customer.child_ids.filtered('warehouse')[:1].id,
+                'zip_code': cls.postal_codes[rnd.randrange(len(cls.postal_codes))].id,
+                'loading_meter': rnd.choice([0.0, 0.0, 1.2, 2.4]),
+                'line_ids': [Command.create({
+                    'quantity': rnd.randint(1, 5),
+                    'weight': rnd.uniform(10, 500),
+                    'length_cm': rnd.uniform(40, 240),
+                    'width_cm': rnd.uniform(40, 120),
+                    'height_cm': rnd.uniform(20, 220),
+                    'price_unit': rnd.uniform(5, 50),
+                }) for _line in range(LINES_PER_SHIPMENT)],
+            })
+        return vals_list
+
+    @contextmanager
+    def _measure(self, name, records):
+        self.env.flush_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.env.flush_all()
+        duration = time.perf_counter() - start
+        queries = self.env.cr.sql_log_count - queries
+        self.results[name] = {
+            'records': records,
+            'seconds': round(duration, 4),
+            'queries': queries,
+            'records_per_second': round(records / duration, 1) if duration else None,
+        }
+        _logger.info("benchmark %s: %s records in %.3fs, %s queries", name, records, duration, queries)
+
+    def test_create(self):
+        vals_list = self._shipment_vals_list(self.shipment_count)
+        with self._measure('create', len(vals_list)):
+            shipments = self.Shipment.create(vals_list)
+        self.assertEqual(len(shipments), self.shipment_count)
+        self.assertNotIn('New', shipments.mapped('reference'))
+        for shipment in shipments[:10]:
+            self.assertIn(shipment.delivery_company_id, shipment.customer_id.company_ids)
+
+    def test_compute_totals(self):
+        shipments = self.shipments
+        shipments.invalidate_recordset(['total_quantity', 'total_weight', 'total_volume',
+                                        'total_chargeable_weight', 'total_price'])
+        with self._measure('compute_totals', len(shipments)):
+            shipments._recompute_totals()
+        for shipment in shipments[:10]:
+            self.assertEqual(shipment.total_quantity, sum(shipment.line_ids.mapped('quantity')))
+            self.assertAlmostEqual(shipment.total_weight, sum(shipment.line_ids.mapped('weight')), places=2)
+
+    def test_compute_chargeable_weight(self):
+        lines = self.shipments.line_ids
+        with self._measure('compute_chargeable_weight', len(lines)):
+            for fname in ('volumetric_weight', 'chargeable_weight'):
+                self.env.add_to_compute(lines._fields[fname], lines)
+            lines.flush_recordset(['volumetric_weight', 'chargeable_weight'])
+        for line in lines[:20]:
+            self.assertGreaterEqual(line.chargeable_weight, line.weight)
+
+    def test_action_confirm(self):
+        with self._measure('action_confirm', len(self.shipments)):
+            self.shipments.action_confirm()
+        self.assertEqual(set(self.shipments.mapped('state')), {'confirmed'})
+
+    def test_list_search_read(self):
+        view = self.env.ref('shipment_management.view_shipment_management_all_list')
+        arch = etree.fromstring(view.arch)
+        fnames = [node.get('name') for node in arch.iterfind('field') if node.get('name') in self.Shipment._fields]
+        self.env.invalidate_all()
+        with self._measure('list_search_read_page', 80):
+            self.Shipment.search_read([], fnames, limit=80)
+        self.env.invalidate_all()
+        with self._measure('list_search_read_all', len(self.shipments)):
+            rows = self.Shipment.search_read([('id', 'in', self.shipments.ids)], fnames)
+        self.assertEqual(len(rows), len(self.shipments))
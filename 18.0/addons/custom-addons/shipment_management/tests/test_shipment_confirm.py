@@ -0,0 +1,30 @@
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestShipmentConfirm(ShipmentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.shipments = cls.env['shipment.management'].create([
+            cls._shipment_vals(ref_customer='CONFIRM-%s' % index, line_ids=[{'quantity': 1, 'weight': 100}])
+            for index in range(3)
+        ])
+
+    def test_confirm_from_list(self):
+        draft, confirmed, delivered = self.shipments
+        confirmed.action_confirm()
+        delivered.state = 'delivered'
+
+        with self.assertRaises(UserError) as error:
+            self.shipments.action_confirm()
+        self.assertIn(delivered.reference, str(error.exception))
+        self.assertNotIn(draft.reference, str(error.exception))
+        self.assertEqual(self.shipments.mapped('state'), ['draft', 'confirmed', 'delivered'])
+
+        (draft | confirmed).action_confirm()
+        self.assertEqual(self.shipments.mapped('state'), ['confirmed', 'confirmed', 'delivered'])
@@ -0,0 +1,73 @@
+import io
+
+from odoo.tests import TransactionCase, tagged
+
+from ..tools.shipment_io import iter_csv, iter_jsonl, read_shipments
+
+MANIFEST = """reference,shipment_type,customer_ref,ref_customer,delivery_company,zip,quantity,weight
+,export,IMP-CUST,PO-1,DELIVERY-1,60549,2,100
+,export,IMP-CUST,PO-1,DELIVERY-1,60549,1,250
+,import,IMP-CUST,PO-2,Delivery Two,,1,80
+,export,UNKNOWN,PO-3,DELIVERY-1,60549,1,10
+,export,IMP-CUST,PO-4,DELIVERY-1,99999,1,10
+"""
+
+
+@tagged('post_install', '-at_install')
+class TestShipmentImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Partner = cls.env['res.partner']
+        cls.customer = Partner.create({'name': 'Import customer', 'ref': 'IMP-CUST'})
+        cls.delivery_one = Partner.create({'name': 'Delivery One', 'ref': 'DELIVERY-1'})
+        cls.delivery_two = Partner.create({'name': 'Delivery Two', 'zip': '65428'})
+        cls.postal_codes = cls.env['postal.code'].create([
+            {'name': '60549', 'city': 'Frankfurt'},
+            {'name': '65428', 'city': 'Rüsselsheim'},
+        ])
+
+    def _import(self, content, file_format='csv'):
+        return self.env['shipment.management'].import_shipments(
+            read_shipments(io.StringIO(content), file_format), chunk_size=2)
+
+    def test_import_csv(self):
+        stats = self._import(MANIFEST)
+        self.assertEqual(stats['rows'], 4)
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual([row for row, _error in stats['errors']], [5, 6])
+
+        shipments = self.env['shipment.management'].search([('customer_id', '=', self.customer.id)], order='id')
+        self.assertEqual(shipments.mapped('ref_customer'), ['PO-1', 'PO-2'])
+        self.assertEqual(shipments[0].line_ids.mapped('weight'), [100, 250])
+        self.assertEqual(shipments[0].delivery_company_id, self.delivery_one)
+        # without ZIP the delivery company's is used
+        self.assertEqual(shipments[1].zip_code.name, '65428')
+        # the deferred totals are written to the database, not just computed on read
+        self.env.cr.flush()
+        self.env.cr.execute("""
+            SELECT total_quantity, total_weight::float8
+              FROM shipment_management
+             WHERE id = ANY(%s)
+          ORDER BY id
+        """, [shipments.ids])
+        self.assertEqual(self.env.cr.fetchall(), [(3, 350.0), (1, 80.0)])
+
+    def test_export_round_trip(self):
+        self._import(MANIFEST)
+        shipments = self.env['shipment.management'].search([('customer_id', '=', self.customer.id)], order='id')
+        exported = list(shipments._iter_export(batch_size=1))
+        self.assertEqual([len(shipment['lines']) for shipment in exported], [2, 1])
+
+        for shipment in exported:
+            shipment['reference'] = ''
+            shipment['ref_customer'] += '-COPY'
+        content = "".join(iter_csv(exported))
+        self.assertEqual(content.count('\n'), 4)
+        stats = self._import(content)
+        self.assertEqual((stats['created'], stats['errors']), (2, []))
+
+        stats = self._import("".join(iter_jsonl(exported)) + "not json\n", 'jsonl')
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual([row for row, _error in stats['errors']], [3])
@@ -0,0 +1,33 @@
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestShipmentReference(ShipmentCommon):
+
+    def test_batch_references(self):
+        shipments = self.env['shipment.management'].create([
+            self._shipment_vals(shipment_type='import'), self._shipment_vals(),
+            self._shipment_vals(shipment_type='import'),
+            self._shipment_vals(shipment_type='import', reference='MANUAL-1'), self._shipment_vals(),
+        ])
+        references = shipments.mapped('reference')
+        self.assertEqual(len(set(references)), 5)
+        self.assertEqual(references[3], 'MANUAL-1')
+
+        imports = [references[0], references[2]]
+        exports = [references[1], references[4]]
+        self.assertTrue(all(reference.startswith('C7-IMP-') for reference in imports))
+        self.assertTrue(all(reference.startswith('C7-EXP-') for reference in exports))
+        # consecutive and in creation order within the batch
+        for first, second in (imports, exports):
+            self.assertEqual(int(second[-4:]), int(first[-4:]) + 1)
+
+    def test_no_gap_block(self):
+        sequence = self.env.ref('shipment_management.seq_shipment_export')
+        sequence.implementation = 'no_gap'
+        block = self.env['ir.sequence'].next_block_by_code('shipment.management.export', 3)
+        following = self.env['ir.sequence'].next_by_code('shipment.management.export')
+        numbers = [int(reference[-4:]) for reference in block + [following]]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + 4)))
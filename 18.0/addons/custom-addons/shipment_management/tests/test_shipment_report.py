@@ -0,0 +1,26 @@
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestShipmentReport(ShipmentCommon):
+
+    def test_refresh_aggregates(self):
+        self.postal_code.zone = '2'
+        shipments = self.env['shipment.management'].create([self._shipment_vals(
+            shipment_type='import',
+            order_date='2025-03-01',
+            line_ids=[Command.create({'quantity': 2, 'weight': weight, 'price_unit': 10.0})],
+        ) for weight in (100.0, 250.0)])
+
+        self.env['shipment.report']._refresh()
+        row = self.env['shipment.report'].search([('customer_id', '=', self.customer.id)])
+        self.assertEqual(len(row), 1)
+        self.assertEqual(row.id, min(shipments.ids))
+        self.assertEqual(row.zone, '2')
+        self.assertEqual(row.shipment_count, 2)
+        self.assertEqual(row.total_quantity, 4)
+        self.assertAlmostEqual(row.total_weight, 350.0)
+        self.assertAlmostEqual(row.total_price, 40.0)
@@ -0,0 +1,42 @@
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestShipmentTotals(ShipmentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.shipments = cls.env['shipment.management'].create([
+            cls._shipment_vals(ref_customer='TOTALS-%s' % index) for index in range(2)
+        ])
+
+    def _stored_totals(self):
+        self.env.cr.execute("""
+            SELECT total_quantity, total_weight::float8, total_price::float8
+              FROM shipment_management
+             WHERE id = ANY(%s)
+          ORDER BY id
+        """, [self.shipments.ids])
+        return self.env.cr.fetchall()
+
+    def test_deferred_totals_are_stored(self):
+        Line = self.env['shipment.line'].with_context(defer_shipment_totals=True)
+        lines = Line.create([{
+            'shipment_id': shipment.id,
+            'quantity': 2,
+            'weight': 100.0 * (index + 1),
+            'price_unit': 10.0,
+        } for index, shipment in enumerate(self.shipments)])
+        self.env.cr.flush()
+        self.assertEqual(self._stored_totals(), [(2, 100.0, 20.0), (2, 200.0, 20.0)])
+
+        lines[0].write({'shipment_id': self.shipments[1].id})
+        self.env.cr.flush()
+        self.assertEqual(self._stored_totals(), [(0, 0.0, 0.0), (4, 300.0, 40.0)])
+
+        lines.unlink()
+        self.env.cr.flush()
+        self.assertEqual(self._stored_totals(), [(0, 0.0, 0.0), (0, 0.0, 0.0)])
@@ -0,0 +1,42 @@
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import ShipmentCommon
+
+
+@tagged('post_install', '-at_install')
+class TestVehicleAssignment(ShipmentCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Vehicle = cls.env['shipment.vehicle']
+        cls.Vehicle.search([]).available = False
+        cls.plain = cls.Vehicle.create({'name': 'Plain', 'max_weight': 1000, 'max_loading_meter': 0})
+        cls.secured = cls.Vehicle.create({'name': 'Secured', 'secured': True, 'max_weight': 1000,
+                                          'max_loading_meter': 0})
+        cls.postal_code.zone = '1'
+        cls.date = '2025-03-03'
+        cls.shipments = cls.env['shipment.management'].create([cls._shipment_vals(
+            order_date=cls.date,
+            spx_status=spx_status,
+            line_ids=[Command.create({'quantity': 1, 'weight': weight})],
+        ) for spx_status, weight in [('secured', 600), ('unsecured', 900), ('unsecured', 700), ('unsecured', 300)]])
+        cls.shipments.action_confirm()
+
+    def test_assign(self):
+        wizard = self.env['shipment.vehicle.assignment'].create({'date': self.date})
+        self.assertEqual(wizard.vehicle_ids, self.plain | self.secured)
+        wizard.action_assign()
+
+        secured, big, too_big, small = self.shipments
+        self.assertEqual(secured.vehicle_id, self.secured)
+        self.assertEqual(big.vehicle_id, self.plain)
+        # the plain vehicle is full, plain shipments may use the secured one
+        self.assertEqual(small.vehicle_id, self.secured)
+        self.assertFalse(too_big.vehicle_id)
+        self.assertEqual(wizard.unassigned_shipment_ids, too_big)
+        loads = {line.vehicle_id: line for line in wizard.line_ids}
+        self.assertEqual(loads[self.plain].shipment_count, 1)
+        self.assertEqual(loads[self.secured].shipment_count, 2)
+        self.assertAlmostEqual(loads[self.secured].fill_rate, 90.0)
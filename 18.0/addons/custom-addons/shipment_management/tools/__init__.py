@@ -0,0 +1,6 @@
+from . import indexes
+from . import packing
+from . import weights
+from . import zip_codes
+from . import ttl_cache
+from . import shipment_io
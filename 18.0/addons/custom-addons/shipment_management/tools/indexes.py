@@ -0,0 +1,91 @@
+# Indexes of the shipment tables that field declarations cannot
+# express: composite and partial indexes matching the list views' filters and
+# order, and the queues of background jobs.
+import logging
+from collections import namedtuple
+from contextlib import closing
+
+from odoo.tools import SQL
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+OPEN_STATES = ('draft', 'confirmed', 'picked')
+
+ManagedIndex = namedtuple('ManagedIndex', ['name', 'table', 'expressions', 'where'])
+
+MANAGED_INDEXES = [
+    # list views are ordered by id desc and filtered by state/type
+    ManagedIndex('shipment_management_state_type_id_index', 'shipment_management',
+                 ['state', 'shipment_type', 'id DESC'], ''),
+    ManagedIndex('shipment_management_open_order_date_index', 'shipment_management',
+                 ['order_date', 'id'], "state IN ('draft', 'confirmed', 'picked')"),
+    ManagedIndex('shipment_management_order_date_id_index', 'shipment_management',
+                 ['order_date', 'id DESC'], ''),
+    ManagedIndex('shipment_management_customer_id_index', 'shipment_management',
+                 ['customer_id', 'id DESC'], ''),
+    ManagedIndex('shipment_management_zip_code_id_index', 'shipment_management',
+                 ['zip_code', 'id DESC'], ''),
+    # totals, confirmation checks and the one2many of the form
+    ManagedIndex('shipment_line_shipment_lookup_index', 'shipment_line', ['shipment_id'], ''),
+    # lines waiting for the repricing cron after a tariff change
+    ManagedIndex('shipment_line_reprice_needed_index', 'shipment_line', ['id'], 'reprice_needed'),
+]
+
+# larger tables get their indexes built concurrently once the upgrade is committed
+CONCURRENT_MIN_SIZE = 64 * 1024 * 1024
+
+
+def _concurrent_index_sql(index):
+    return SQL(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON %s (%s)%s",
+        SQL.identifier(index.name),
+        SQL.identifier(index.table),
+        SQL(", ".join(index.expressions)),
+        SQL(" WHERE %s" % index.where) if index.where else SQL(),
+    )
+
+
+def get_index_states(cr, names):
+    """ Return {index name: valid} for the existing indexes among ``names``. """
+    cr.execute("""
+        SELECT c.relname, i.indisvalid
+          FROM pg_index i
+          JOIN pg_class c ON c.oid = i.indexrelid
+         WHERE c.relname = ANY(%s)
+    """, [list(names)])
+    return dict(cr.fetchall())
+
+
+def ensure_managed_indexes(env, table):
+    """ Create the missing (or invalid) managed indexes of ``table``: right
+    away for small tables, concurrently after the commit for large ones.
+    """
+    cr = env.cr
+    indexes = [index for index in MANAGED_INDEXES if index.table == table]
+    states = get_index_states(cr, [index.name for index in indexes])
+    todo = [index for index in indexes if not states.get(index.name)]
+    if not todo:
+        return
+    cr.execute("SELECT pg_relation_size(%s)", [table])
+    if cr.fetchone()[0] < CONCURRENT_MIN_SIZE:
+        for index in todo:
+            if index.name in states:
+                cr.execute(SQL("DROP INDEX %s", SQL.identifier(index.name)))
+            create_index(cr, index.name, table, index.expressions, where=index.where)
+        return
+
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction and waits for
+    # every older snapshot, including the upgrade's own: build after commit
+    _logger.info("Building %s concurrently after commit", ", ".join(index.name for index in todo))
+    registry = env.registry
+
+    @cr.postcommit.add
+    def _build_indexes():
+        with closing(registry.cursor()) as index_cr:
+            index_cr._cnx.autocommit = True
+            for index in todo:
+                if index.name in states:
+                    index_cr.execute(SQL("DROP INDEX CONCURRENTLY IF EXISTS %s", SQL.identifier(index.name)))
+                index_cr.execute(_concurrent_index_sql(index))
+                _logger.info("Index %s built", index.name)
@@ -0,0 +1,95 @@
+# First-fit decreasing packing of shipments onto vehicles, on two capacity
+# dimensions (weight and loading meters). A vehicle serves a single zone.
+from collections import namedtuple
+
+PackItem = namedtuple('PackItem', ['key', 'weight', 'loading_meter', 'secured', 'express', 'zone'])
+PackBin = namedtuple('PackBin', ['key', 'max_weight', 'max_loading_meter', 'secured', 'express'])
+
+
+class Load:
+    __slots__ = ('weight', 'loading_meter', 'zone', 'count')
+
+    def __init__(self):
+        self.weight = 0.0
+        self.loading_meter = 0.0
+        self.zone = None
+        self.count = 0
+
+    def add(self, item):
+        self.weight += item.weight
+        self.loading_meter += item.loading_meter
+        self.zone = self.zone or item.zone
+        self.count += 1
+
+
+def _fits(vehicle, load, item):
+    # a capacity of 0 means unlimited
+    return (
+        (not load.zone or not item.zone or load.zone == item.zone)
+        and (not vehicle.max_weight or load.weight + item.weight <= vehicle.max_weight)
+        and (not vehicle.max_loading_meter or load.loading_meter + item.loading_meter <= vehicle.max_loading_meter)
+    )
+
+
+def pack(items, bins, preloaded=()):
+    """ Assign ``items`` to ``bins``. A secured (express) item only goes to a
+    secured (express) bin; plain items prefer plain bins and only use the
+    special ones when the plain bins are full. ``preloaded`` items are
+    already on their bin, given as (item, bin key) pairs.
+
+    Returns ``({item key: bin key}, [unplaced item keys], {bin key: Load})``.
+    """
+    loads = {vehicle.key: Load() for vehicle in bins}
+    for item, bin_key in preloaded:
+        if bin_key in loads:
+            loads[bin_key].add(item)
+
+    # candidate bins per (secured, express) requirement, exact matches first,
+    # largest first inside a class
+    ordered_bins = sorted(bins, key=lambda vehicle: (-(vehicle.max_weight or float('inf')),
+                                                    -(vehicle.max_loading_meter or float('inf'))))
+    candidates = {}
+    for secured in (False, True):
+        for express in (False, True):
+            compatible = [
+                vehicle for vehicle in ordered_bins
+                if (vehicle.secured or not secured) and (vehicle.express or not express)
+            ]
+            compatible.sort(key=lambda vehicle: (vehicle.secured and not secured) + (vehicle.express and not express))
+            candidates[secured, express] = compatible
+
+    # most constrained first, then by decreasing size relative to the largest bin
+    max_weight = max((vehicle.max_weight for vehicle in bins), default=0) or 1.0
+    max_loading_meter = max((vehicle.max_loading_meter for vehicle in bins), default=0) or 1.0
+    items = sorted(items, key=lambda item: (
+        not (item.secured or item.express),
+        -max(item.weight / max_weight, item.loading_meter / max_loading_meter),
+    ))
+
+    # a bin that cannot take the smallest item any more is dropped from the candidates
+    min_weight = min((item.weight for item in items), default=0.0)
+    min_loading_meter = min((item.loading_meter for item in items), default=0.0)
+
+    def is_full(vehicle, load):
+        return (
+            (vehicle.max_weight and load.weight + min_weight > vehicle.max_weight)
+            or (vehicle.max_loading_meter and load.loading_meter + min_loading_meter > vehicle.max_loading_meter)
+        )
+
+    assignment = {}
+    unplaced = []
+    for item in items:
+        compatible = candidates[bool(item.secured), bool(item.express)]
+        for vehicle in compatible:
+            load = loads[vehicle.key]
+            if _fits(vehicle, load, item):
+                load.add(item)
+                assignment[item.key] = vehicle.key
+                if is_full(vehicle, load):
+                    for bins_list in candidates.values():
+                        if vehicle in bins_list:
+                            bins_list.remove(vehicle)
+                break
+        else:
+            unplaced.append(item.key)
+    return assignment, unplaced, loads
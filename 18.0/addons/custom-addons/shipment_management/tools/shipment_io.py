@@ -0,0 +1,82 @@
+# Streaming shipment manifests: CSV with one row per shipment line (shipment
+# columns repeated), or JSON Lines with one shipment and its lines per line.
+import csv
+import io
+import json
+
+SHIPMENT_COLUMNS = [
+    'reference', 'shipment_type', 'customer_ref', 'ref_customer', 'delivery_company', 'zip', 'order_date',
+    'spx_status', 'express', 'dangerous', 'taillift', 'loading_meter', 'vehicle', 'notes',
+]
+LINE_COLUMNS = ['quantity', 'weight', 'length_cm', 'width_cm', 'height_cm', 'price_unit']
+
+FORMATS = {
+    'csv': ('text/csv;charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson;charset=utf-8', 'jsonl'),
+}
+
+
+def _shipment_key(row):
+    return row.get('reference'), row.get('customer_ref'), row.get('ref_customer')
+
+
+def read_shipments(stream, file_format='csv', delimiter=','):
+    """ Yield ``(row number, shipment dict)`` from a text stream, one shipment
+    at a time. Shipment dicts hold the SHIPMENT_COLUMNS and a ``lines`` list
+    of LINE_COLUMNS dicts; consecutive CSV rows of the same shipment
+    (reference, customer ref and order reference) are merged. Unreadable
+    JSON lines yield ``{'error': message}``.
+    """
+    if file_format == 'jsonl':
+        for number, text in enumerate(stream, 1):
+            if not text.strip():
+                continue
+            try:
+                shipment = json.loads(text)
+            except ValueError as e:
+                yield number, {'error': str(e)}
+                continue
+            if not isinstance(shipment, dict):
+                yield number, {'error': "a line must hold a JSON object"}
+                continue
+            shipment['lines'] = shipment.get('lines') or []
+            yield number, shipment
+        return
+
+    current = key = number = None
+    # the header is row 1
+    for row_number, row in enumerate(csv.DictReader(stream, delimiter=delimiter), 2):
+        row = {(column or '').strip().lower(): (value or '').strip() for column, value in row.items()}
+        if current is None or _shipment_key(row) != key:
+            if current is not None:
+                yield number, current
+            current = {column: row.get(column, '') for column in SHIPMENT_COLUMNS}
+            current['lines'] = []
+            key = _shipment_key(row)
+            number = row_number
+        if any(row.get(column) for column in LINE_COLUMNS):
+            current['lines'].append({column: row.get(column, '') for column in LINE_COLUMNS})
+    if current is not None:
+        yield number, current
+
+
+def iter_csv(shipments, delimiter=','):
+    """ Yield CSV text chunks for shipment dicts: the header, then one chunk per shipment. """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+    writer.writerow(SHIPMENT_COLUMNS + LINE_COLUMNS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for shipment in shipments:
+        values = [shipment.get(column, '') for column in SHIPMENT_COLUMNS]
+        for line in shipment['lines'] or [{}]:
+            writer.writerow(values + [line.get(column, '') for column in LINE_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_jsonl(shipments):
+    for shipment in shipments:
+        yield json.dumps(shipment, default=str) + '\n'
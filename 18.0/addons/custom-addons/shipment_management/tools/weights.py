@@ -0,0 +1,44 @@
+# Column-wise weight computations shared by the shipment.line computes and
+# the bulk import paths. Every argument is a sequence with one item per line.
+
+VOLUMETRIC_DIVISOR = 6000
+LOADING_METER_WEIGHT = 700
+
+
+def compute_volumes(lengths, widths, heights):
+    return [
+        (length / 100 * width / 100 * height / 100) if length and width and height else 0.0
+        for length, width, height in zip(lengths, widths, heights)
+    ]
+
+
+def compute_volumetric_weights(lengths, widths, heights, volumes):
+    return [
+        (length * width * height) / VOLUMETRIC_DIVISOR if length and width and height
+        else (volume * 1000000 / VOLUMETRIC_DIVISOR if volume else 0.0)
+        for length, width, height, volume in zip(lengths, widths, heights, volumes)
+    ]
+
+
+def compute_chargeable_weights(weights, volumetric_weights, loading_meters):
+    return [
+        max(weight or 0.0, volumetric_weight, (loading_meter or 0) * LOADING_METER_WEIGHT)
+        for weight, volumetric_weight, loading_meter in zip(weights, volumetric_weights, loading_meters)
+    ]
+
+
+def compute_line_weights(lengths, widths, heights, volumes, weights, loading_meters):
+    """ Return the (volumes, volumetric weights, chargeable weights) columns.
+
+    Lines with all three dimensions get their volume from them, the others
+    keep the given volume, as the shipment.line computes do.
+    """
+    dimension_volumes = compute_volumes(lengths, widths, heights)
+    volumes = [
+        dimension_volume if length and width and height else (volume or 0.0)
+        for dimension_volume, volume, length, width, height
+        in zip(dimension_volumes, volumes, lengths, widths, heights)
+    ]
+    volumetric_weights = compute_volumetric_weights(lengths, widths, heights, volumes)
+    chargeable_weights = compute_chargeable_weights(weights, volumetric_weights, loading_meters)
+    return volumes, volumetric_weights, chargeable_weights
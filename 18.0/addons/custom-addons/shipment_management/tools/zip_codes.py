@@ -0,0 +1,42 @@
+import csv
+import io
+
+# GeoNames postal code dump: country, postal code, place name, admin name/code 1-3,
+# latitude, longitude, accuracy (tab separated, no header)
+GEONAMES_COLUMNS = [
+    'country_code', 'name', 'city', 'admin_name1', 'admin_code1', 'admin_name2', 'admin_code2',
+    'admin_name3', 'admin_code3', 'latitude', 'longitude', 'accuracy',
+]
+
+# Column names accepted for the ZIP itself in plain CSV files
+CSV_ZIP_COLUMNS = ('name', 'zip', 'plz', 'postal_code')
+
+
+def is_valid_zip(zip_code, country_code=None):
+    if country_code == 'DE':
+        return bool(zip_code) and len(zip_code) == 5 and zip_code.isdigit()
+    return bool(zip_code)
+
+
+def read_postal_codes(stream, file_format='csv', delimiter=','):
+    """ Yield postal code dicts (name, city, code, zone, ...) from a text stream,
+    one line at a time, so whole country datasets never sit in memory.
+    """
+    if file_format == 'geonames':
+        for line in stream:
+            values = line.rstrip('\r\n').split('\t')
+            if len(values) < 3:
+                continue
+            row = dict(zip(GEONAMES_COLUMNS, values))
+            row['name'] = row['name'].strip()
+            row['city'] = row['city'].strip()
+            yield row
+        return
+    for row in csv.DictReader(stream, delimiter=delimiter):
+        row = {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+        row['name'] = next((row[column] for column in CSV_ZIP_COLUMNS if row.get(column)), '')
+        yield row
+
+
+def open_text(data, encoding='utf-8-sig'):
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, newline='')
@@ -0,0 +1,5 @@
+from . import postal_code_import
+from . import shipment_query_plan
+from . import vehicle_assignment
+from . import shipment_export
+from . import shipment_import
@@ -0,0 +1,40 @@
+import base64
+
+from odoo import fields, models, _
+
+from ..tools.zip_codes import open_text, read_postal_codes
+
+
+class PostalCodeImport(models.TransientModel):
+    _name = 'postal.code.import'
+    _description = "Postal code import"
+
+    file = fields.Binary(string="File", required=True)
+    filename = fields.Char(string="File name")
+    file_format = fields.Selection([
+        ('csv', 'CSV (name/zip, city, code, zone)'),
+        ('geonames', 'GeoNames (tab separated)'),
+    ], string="Format", required=True, default='csv')
+    delimiter = fields.Char(string="Delimiter", default=',')
+    country_id = fields.Many2one('res.country', string="Country",
+                                 default=lambda self: self.env.ref('base.de', raise_if_not_found=False))
+
+    def action_import(self):
+        self.ensure_one()
+        stream = open_text(base64.b64decode(self.file))
+        rows = read_postal_codes(stream, self.file_format, self.delimiter or ',')
+        stats = self.env['postal.code'].import_rows(rows, self.country_id)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'title': _("Postal codes imported"),
+                'message': _(
+                    "%(rows)s rows in %(duration).1fs (%(rows_per_second).0f rows/s): "
+                    "%(inserted)s new, %(updated)s updated, %(skipped)s skipped, %(duplicates)s duplicates.",
+                    **stats,
+                ),
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
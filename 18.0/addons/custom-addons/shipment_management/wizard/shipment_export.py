@@ -0,0 +1,29 @@
+from odoo import fields, models
+
+
+class ShipmentExport(models.TransientModel):
+    _name = 'shipment.export'
+    _description = "Shipment export"
+
+    shipment_ids = fields.Many2many(
+        'shipment.management', string="Shipments",
+        default=lambda self: self.env.context.get('active_ids') if self.env.context.get(
+            'active_model') == 'shipment.management' else [])
+    shipment_count = fields.Integer(string="Shipments", compute='_compute_shipment_count')
+    file_format = fields.Selection([
+        ('csv', 'CSV (one row per line)'),
+        ('jsonl', 'JSON Lines (one shipment per line)'),
+    ], string="Format", required=True, default='csv')
+    delimiter = fields.Char(string="Delimiter", default=',')
+
+    def _compute_shipment_count(self):
+        for export in self:
+            export.shipment_count = len(export.shipment_ids)
+
+    def action_export(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/shipment_management/export/%s' % self.id,
+            'target': 'self',
+        }
@@ -0,0 +1,51 @@
+import base64
+
+from odoo import fields, models, _
+
+from ..tools.shipment_io import read_shipments
+from ..tools.zip_codes import open_text
+
+
+class ShipmentImport(models.TransientModel):
+    _name = 'shipment.import'
+    _description = "Shipment import"
+
+    file = fields.Binary(string="File", required=True)
+    filename = fields.Char(string="File name")
+    file_format = fields.Selection([
+        ('csv', 'CSV (one row per line)'),
+        ('jsonl', 'JSON Lines (one shipment per line)'),
+    ], string="Format", required=True, default='csv')
+    delimiter = fields.Char(string="Delimiter", default=',')
+    shipment_type = fields.Selection([('import', 'Import'), ('export', 'Export')],
+                                     string="Default type", help="Used for rows without shipment type")
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    row_count = fields.Integer(string="Rows", readonly=True)
+    created_count = fields.Integer(string="Created", readonly=True)
+    error_count = fields.Integer(string="Errors", readonly=True)
+    rows_per_second = fields.Float(string="Rows/s", digits=(16, 0), readonly=True)
+    errors = fields.Text(string="Error details", readonly=True)
+
+    def action_import(self):
+        self.ensure_one()
+        stream = open_text(base64.b64decode(self.file))
+        shipments = read_shipments(stream, self.file_format, self.delimiter or ',')
+        Shipment = self.env['shipment.management']
+        if self.shipment_type:
+            Shipment = Shipment.with_context(default_shipment_type=self.shipment_type)
+        stats = Shipment.import_shipments(shipments)
+        self.write({
+            'state': 'done',
+            'row_count': stats['rows'],
+            'created_count': stats['created'],
+            'error_count': len(stats['errors']),
+            'rows_per_second': stats['rows_per_second'],
+            'errors': "\n".join(_("Row %(row)s: %(error)s", row=row, error=error) for row, error in stats['errors']),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
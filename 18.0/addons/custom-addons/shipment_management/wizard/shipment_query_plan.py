@@ -0,0 +1,92 @@
+import json
+from datetime import timedelta
+
+from odoo import fields, models, _, Command
+from odoo.tools import SQL
+
+from ..tools.indexes import MANAGED_INDEXES, OPEN_STATES, get_index_states
+
+
+class ShipmentQueryPlan(models.TransientModel):
+    _name = 'shipment.query.plan'
+    _description = "Shipment query plans"
+
+    line_ids = fields.One2many('shipment.query.plan.line', 'plan_id', string="Searches", readonly=True)
+    missing_index_names = fields.Text(string="Missing indexes", readonly=True)
+
+    def _get_standard_searches(self):
+        # (label, model, domain, order, limit) of the searches the shipment views run,
+        # with values taken from the latest shipment
+        sample = self.env['shipment.management'].search([], limit=1)
+        today = fields.Date.context_today(self)
+        return [
+            (_("All shipments"), 'shipment.management', [], None, 80),
+            (_("Open shipments by order date"), 'shipment.management',
+             [('state', 'in', list(OPEN_STATES))], 'order_date, id', 80),
+            (_("Import drafts"), 'shipment.management',
+             [('state', '=', 'draft'), ('shipment_type', '=', 'import')], None, 80),
+            (_("Last 30 days"), 'shipment.management',
+             [('order_date', '>=', today - timedelta(days=30))], None, 80),
+            (_("Shipments of a customer"), 'shipment.management',
+             [('customer_id', '=', sample.customer_id.id)], None, 80),
+            (_("Shipments of a ZIP code"), 'shipment.management',
+             [('zip_code', '=', sample.zip_code.id)], None, 80),
+            (_("Lines of a shipment"), 'shipment.line', [('shipment_id', '=', sample.id)], None, None),
+        ]
+
+    def action_explain(self):
+        self.ensure_one()
+        lines = []
+        for label, model, domain, order, limit in self._get_standard_searches():
+            query = self.env[model]._search(domain, order=order, limit=limit)
+            self.env.cr.execute(SQL("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) %s", query.select()))
+            result = self.env.cr.fetchone()[0][0]
+            nodes = list(_iter_nodes(result['Plan']))
+            lines.append({
+                'name': label,
+                'model': model,
+                'domain': repr(domain),
+                'execution_ms': result['Execution Time'],
+                'planning_ms': result['Planning Time'],
+                'row_count': result['Plan'].get('Actual Rows', 0),
+                'scans': ", ".join(node['Node Type'] for node in nodes if 'Scan' in node['Node Type']),
+                'index_names': ", ".join(sorted({node['Index Name'] for node in nodes if node.get('Index Name')})),
+                'plan': json.dumps(result['Plan'], indent=2),
+            })
+        states = get_index_states(self.env.cr, [index.name for index in MANAGED_INDEXES])
+        self.write({
+            'line_ids': [Command.clear()] + [Command.create(vals) for vals in lines],
+            'missing_index_names': "\n".join(
+                index.name + ("" if index.name not in states else _(" (invalid)"))
+                for index in MANAGED_INDEXES if not states.get(index.name)
+            ),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+
+class ShipmentQueryPlanLine(models.TransientModel):
+    _name = 'shipment.query.plan.line'
+    _description = "Shipment query plan"
+
+    plan_id = fields.Many2one('shipment.query.plan', required=True, ondelete='cascade')
+    name = fields.Char(string="Search")
+    model = fields.Char(string="Model")
+    domain = fields.Char(string="Domain")
+    execution_ms = fields.Float(string="Execution (ms)", digits=(16, 3))
+    planning_ms = fields.Float(string="Planning (ms)", digits=(16, 3))
+    row_count = fields.Integer(string="Rows")
+    scans = fields.Char(string="Scans")
+    index_names = fields.Char(string="Indexes used")
+    plan = fields.Text(string="Plan")
+
+
+def _iter_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _iter_nodes(child)
@@ -0,0 +1,76 @@
+import time
+
+from odoo import api, fields, models, _, Command
+
+
+class VehicleAssignment(models.TransientModel):
+    _name = 'shipment.vehicle.assignment'
+    _description = "Vehicle assignment"
+
+    date = fields.Date(string="Order Date", required=True, default=fields.Date.context_today)
+    vehicle_ids = fields.Many2many('shipment.vehicle', string="Vehicles",
+                                   default=lambda self: self.env['shipment.vehicle'].search([('available', '=', True)]))
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    line_ids = fields.One2many('shipment.vehicle.assignment.line', 'assignment_id', string="Vehicle loads",
+                               readonly=True)
+    unassigned_shipment_ids = fields.Many2many('shipment.management', string="Not assigned", readonly=True)
+    duration = fields.Float(string="Duration (s)", digits=(16, 3), readonly=True)
+
+    def action_assign(self):
+        self.ensure_one()
+        start = time.monotonic()
+        unassigned, loads = self.env['shipment.management']._assign_vehicles(self.date, self.vehicle_ids)
+        self.write({
+            'state': 'done',
+            'duration': time.monotonic() - start,
+            'unassigned_shipment_ids': [Command.set(unassigned.ids)],
+            'line_ids': [Command.clear()] + [Command.create({
+                'vehicle_id': vehicle.id,
+                'zone': loads[vehicle.id].zone,
+                'shipment_count': loads[vehicle.id].count,
+                'weight': loads[vehicle.id].weight,
+                'loading_meter': loads[vehicle.id].loading_meter,
+            }) for vehicle in self.vehicle_ids if loads[vehicle.id].count],
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def action_open_shipments(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _("Shipments of %s", self.date),
+            'res_model': 'shipment.management',
+            'view_mode': 'list,form',
+            'views': [(self.env.ref('shipment_management.view_shipment_management_all_list').id, 'list'),
+                      (False, 'form')],
+            'domain': [('state', '=', 'confirmed'), ('order_date', '=', self.date)],
+        }
+
+
+class VehicleAssignmentLine(models.TransientModel):
+    _name = 'shipment.vehicle.assignment.line'
+    _description = "Vehicle load"
+
+    assignment_id = fields.Many2one('shipment.vehicle.assignment', required=True, ondelete='cascade')
+    vehicle_id = fields.Many2one('shipment.vehicle', string="Vehicle")
+    zone = fields.Selection([("1", "1"), ("2", "2")], string="Zone")
+    shipment_count = fields.Integer(string="Shipments")
+    weight = fields.Float(string="Weight (kg)", digits='Product Unit of Measure')
+    max_weight = fields.Float(related='vehicle_id.max_weight')
+    loading_meter = fields.Float(string="Loading meter", digits=(16, 1))
+    max_loading_meter = fields.Float(related='vehicle_id.max_loading_meter')
+    fill_rate = fields.Float(string="Fill rate (%)", compute='_compute_fill_rate', digits=(16, 1))
+
+    @api.depends('weight', 'loading_meter', 'max_weight', 'max_loading_meter')
+    def _compute_fill_rate(self):
+        for line in self:
+            line.fill_rate = 100 * max(
+                line.weight / line.max_weight if line.max_weight else 0.0,
+                line.loading_meter / line.max_loading_meter if line.max_loading_meter else 0.0,
+            )
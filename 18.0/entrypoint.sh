@@ -28,6 +28,32 @@ check_config "db_port" "$PORT"
 check_config "db_user" "$USER"
 check_config "db_password" "$PASSWORD"
 
+# readiness checks on top of the connection: when DB_NAME is set, the Odoo
+# database itself, and the extensions listed in DB_EXTENSIONS (comma or space
+# separated, none by default), e.g. DB_EXTENSIONS=vector when the database
+# server runs init-pgvector.sql
+: ${DB_EXTENSIONS=}
+WAIT_ARGS=()
+for extension in ${DB_EXTENSIONS//,/ }; do
+    WAIT_ARGS+=("--extension" "$extension")
+done
+if [ -n "$DB_NAME" ]; then
+    WAIT_ARGS+=("--db_name" "$DB_NAME")
+fi
+
+# Function to tune workers, connection pool and memory limits to the container
+# resources; odoo and the helper scripts then read the generated config file
+autotune_config() {
+    if [ "${ODOO_AUTOTUNE:-1}" != "0" ] && command -v odoo-autotune.py > /dev/null; then
+        local tuned_rc="${ODOO_AUTOTUNE_RC:-/tmp/odoo-autotune.conf}"
+        if odoo-autotune.py ${DB_ARGS[@]} --config "$ODOO_RC" --output "$tuned_rc"; then
+            export ODOO_RC="$tuned_rc"
+        else
+            echo "Autotuning failed, keeping $ODOO_RC"
+        fi
+    fi
+}
+
 # Function to start addon watcher in background
 start_addon_watcher() {
     if [ -f "/scripts/start-addon-watcher.sh" ]; then
@@ -42,13 +68,15 @@ case "$1" in
         if [[ "$1" == "scaffold" ]] ; then
             exec odoo "$@"
         else
-            wait-for-psql.py ${DB_ARGS[@]} --timeout=30
+            wait-for-psql.py ${DB_ARGS[@]} "${WAIT_ARGS[@]}" --timeout=30
+            autotune_config
             start_addon_watcher
             exec odoo "$@" "${DB_ARGS[@]}"
         fi
         ;;
     -*)
-        wait-for-psql.py ${DB_ARGS[@]} --timeout=30
+        wait-for-psql.py ${DB_ARGS[@]} "${WAIT_ARGS[@]}" --timeout=30
+        autotune_config
         start_addon_watcher
         exec odoo "$@" "${DB_ARGS[@]}"
         ;;
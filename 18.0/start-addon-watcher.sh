@@ -9,6 +9,7 @@ SCRIPT_DIR="/scripts"
 ADDON_WATCHER="$SCRIPT_DIR/addon-watcher.sh"
 WATCHER_LOG="/var/log/odoo-addon-watcher-startup.log"
 WATCHER_PID_FILE="/tmp/addon-watcher.pid"
+ODOO_HEALTH_URL="${ODOO_HEALTH_URL:-http://localhost:8069/web/health}"
 
 # Colors for output
 RED='\033[0;31m'
@@ -90,28 +91,42 @@ show_status() {
     fi
 }
 
-# Function to wait for Odoo to be ready
+# Function to wait for Odoo to be ready: polls the health endpoint with
+# exponential backoff and jitter, starting at 100ms and capped at 5s
 wait_for_odoo() {
-    local max_attempts=30
+    local timeout="${ODOO_READY_TIMEOUT:-120}"
+    local delay_ms=100
     local attempt=0
+    local start=$(date +%s%N)
+    local elapsed_ms=0
 
-    log_info "Waiting for Odoo to be ready..."
+    log_info "Waiting for Odoo to be ready on $ODOO_HEALTH_URL..."
 
-    while [ $attempt -lt $max_attempts ]; do
-        # Check if Odoo process is running
-        if pgrep -f "odoo" > /dev/null; then
-            # Wait a bit more to ensure it's fully started
-            sleep 5
-            log_success "Odoo is ready"
+    while [ $elapsed_ms -lt $((timeout * 1000)) ]; do
+        attempt=$((attempt + 1))
+        if curl -fsS -o /dev/null --max-time 2 "$ODOO_HEALTH_URL" 2>/dev/null; then
+            elapsed_ms=$(( ($(date +%s%N) - start) / 1000000 ))
+            log_success "Odoo is ready after $((elapsed_ms / 1000)).$(printf '%03d' $((elapsed_ms % 1000)))s ($attempt attempts)"
             return 0
         fi
 
-        attempt=$((attempt + 1))
-        log_info "Attempt $attempt/$max_attempts - waiting for Odoo..."
-        sleep 2
+        elapsed_ms=$(( ($(date +%s%N) - start) / 1000000 ))
+        local sleep_ms=$((delay_ms / 2 + RANDOM % (delay_ms / 2 + 1)))
+        local remaining_ms=$((timeout * 1000 - elapsed_ms))
+        if [ $sleep_ms -gt $remaining_ms ]; then
+            sleep_ms=$remaining_ms
+        fi
+        if [ $sleep_ms -gt 0 ]; then
+            sleep "$((sleep_ms / 1000)).$(printf '%03d' $((sleep_ms % 1000)))"
+        fi
+        delay_ms=$((delay_ms * 2))
+        if [ $delay_ms -gt 5000 ]; then
+            delay_ms=5000
+        fi
+        elapsed_ms=$(( ($(date +%s%N) - start) / 1000000 ))
     done
 
-    log_warn "Odoo not detected after $max_attempts attempts, starting watcher anyway"
+    log_warn "Odoo not ready after ${timeout}s ($attempt attempts), starting watcher anyway"
     return 0
 }
 
@@ -134,10 +149,6 @@ case "${1:-start}" in
     "auto")
         # Auto mode: used by container startup
         log_info "=== Auto-starting Deployment Scan ==="
-
-        # Small delay to let container fully initialize
-        sleep 10
-
         wait_for_odoo
         run_deployment_scan
         ;;
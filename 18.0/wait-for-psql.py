@@ -1,32 +1,118 @@
 #!/usr/bin/env python3
 import argparse
+import math
 import psycopg2
+import random
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+FIRST_DELAY = 0.05
+MAX_DELAY = 2.0
+
+
+class NotReady(Exception):
+    pass
+
+
+def parse_hosts(db_host, db_port):
+    # "db", "db1,db2" or "db1:5432,db2:5433"
+    hosts = []
+    for entry in db_host.split(','):
+        host, _sep, port = entry.strip().partition(':')
+        hosts.append((host, port or db_port))
+    return hosts
+
+
+def check_ready(args, host, port, remaining):
+    # libpq only takes whole seconds and treats anything below 2 as 2
+    connect_timeout = max(2, min(5, math.ceil(remaining)))
+    existing_db = False
+    conn = psycopg2.connect(user=args.db_user, host=host, port=port, password=args.db_password,
+                            dbname='postgres', connect_timeout=connect_timeout)
+    try:
+        with conn.cursor() as cr:
+            cr.execute("SELECT pg_is_in_recovery()")
+            if cr.fetchone()[0]:
+                raise NotReady("server is in recovery")
+            # the image init scripts (init-pgvector.sql) run before the server
+            # listens on TCP and create their extensions in this database
+            if args.extension:
+                cr.execute("SELECT extname FROM pg_extension WHERE extname = ANY(%s)", [args.extension])
+                missing = set(args.extension) - {name for name, in cr.fetchall()}
+                if missing:
+                    raise NotReady("extension %s not installed" % ', '.join(sorted(missing)))
+            if args.db_name:
+                cr.execute("SELECT datallowconn FROM pg_database WHERE datname = %s", [args.db_name])
+                row = cr.fetchone()
+                if row and not row[0]:
+                    raise NotReady("database %s does not accept connections" % args.db_name)
+                existing_db = bool(row)
+    finally:
+        conn.close()
+    if existing_db:
+        # a database that does not exist yet is created by Odoo itself
+        psycopg2.connect(user=args.db_user, host=host, port=port, password=args.db_password,
+                         dbname=args.db_name, connect_timeout=connect_timeout).close()
+
+
+def wait_for_host(args, host, port, deadline):
+    """ Probe one server with exponential backoff and full jitter until it is
+    ready or ``deadline`` passes. Returns ``(error, attempts)``.
+    """
+    delay = FIRST_DELAY
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            check_ready(args, host, port, deadline - time.monotonic())
+            return '', attempts
+        except (psycopg2.Error, NotReady) as e:
+            error = str(e).strip() or e.__class__.__name__
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return error, attempts
+        time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+        delay = min(delay * 2, MAX_DELAY)
 
 
 if __name__ == '__main__':
     arg_parser = argparse.ArgumentParser()
-    arg_parser.add_argument('--db_host', required=True)
+    arg_parser.add_argument('--db_host', required=True, help="host, or comma separated host[:port] list")
     arg_parser.add_argument('--db_port', required=True)
     arg_parser.add_argument('--db_user', required=True)
     arg_parser.add_argument('--db_password', required=True)
-    arg_parser.add_argument('--timeout', type=int, default=5)
+    arg_parser.add_argument('--db_name', help="Odoo database that must accept connections if it exists")
+    arg_parser.add_argument('--extension', action='append', default=[],
+                            help="extension that must be installed in the postgres database, repeatable")
+    arg_parser.add_argument('--parallel', action='store_true', help="probe all hosts at the same time")
+    arg_parser.add_argument('--timeout', type=float, default=5)
 
     args = arg_parser.parse_args()
 
-    start_time = time.time()
-    while (time.time() - start_time) < args.timeout:
-        try:
-            conn = psycopg2.connect(user=args.db_user, host=args.db_host, port=args.db_port, password=args.db_password, dbname='postgres')
-            error = ''
-            break
-        except psycopg2.OperationalError as e:
-            error = e
+    hosts = parse_hosts(args.db_host, args.db_port)
+    start_time = time.monotonic()
+    deadline = start_time + args.timeout
+
+    def probe(host_port):
+        host, port = host_port
+        error, attempts = wait_for_host(args, host, port, deadline)
+        return host, port, error, attempts, time.monotonic() - start_time
+
+    if args.parallel and len(hosts) > 1:
+        with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+            results = list(executor.map(probe, hosts))
+    else:
+        results = [probe(host_port) for host_port in hosts]
+
+    failed = False
+    for host, port, error, attempts, elapsed in results:
+        if error:
+            failed = True
+            print("Database connection failure on %s:%s after %.2fs (%s attempts): %s"
+                  % (host, port, elapsed, attempts, error), file=sys.stderr)
         else:
-            conn.close()
-        time.sleep(1)
+            print("Database ready on %s:%s in %.2fs (%s attempts)" % (host, port, elapsed, attempts))
 
-    if error:
-        print("Database connection failure: %s" % error, file=sys.stderr)
+    if failed:
         sys.exit(1)
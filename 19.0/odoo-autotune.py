@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# Startup tuning of the Odoo server for the resources of the container.
+#
+# Reads the CPU and memory limits of the cgroup (v2, then v1, then the host
+# values) and derives, with cpus rounded up and memory in MiB:
+#
+#   usable            = memory * 0.8, the rest is left to the main process,
+#                       the gevent process and the page cache
+#   max_cron_threads  = clamp(cpus // 4, 1, 4)
+#   workers           = min(2 * cpus + 1, usable // 512 - max_cron_threads), at least 1
+#   limit_memory_soft = min(2048, usable / (workers + max_cron_threads))
+#   limit_memory_hard = min(2560, limit_memory_soft * 1.25)
+#   processes         = workers + max_cron_threads + 1 (gevent)
+#   budget            = max_connections - superuser_reserved_connections - reserve
+#   db_maxconn        = clamp(budget // processes, 2, 16)
+#
+# db_maxconn is a per process pool, so when processes * 2 does not fit in the
+# budget, the workers are reduced until it does. Every value can be pinned
+# with an ODOO_<OPTION> environment variable (e.g. ODOO_WORKERS=8).
+# Writes the tuned copy of the configuration file and logs it.
+import argparse
+import configparser
+import math
+import os
+import sys
+
+MIB = 1024 * 1024
+MIN_WORKER_MEMORY = 512
+MAX_MEMORY_SOFT = 2048
+MAX_MEMORY_HARD = 2560
+MIN_DB_MAXCONN = 2
+MAX_DB_MAXCONN = 16
+DEFAULT_MAX_CONNECTIONS = 100
+SECRET_OPTIONS = ('admin_passwd', 'db_password', 'smtp_password')
+
+
+def read_first_line(path):
+    try:
+        with open(path) as stream:
+            return stream.readline().strip()
+    except OSError:
+        return None
+
+
+def read_cpus(cgroup_root):
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = period = None
+    cpu_max = read_first_line(os.path.join(cgroup_root, 'cpu.max'))
+    if cpu_max:
+        value, _sep, period = cpu_max.partition(' ')
+        if value != 'max':
+            quota = int(value)
+            period = int(period or 100000)
+    else:
+        value = read_first_line(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_quota_us'))
+        if value and int(value) > 0:
+            quota = int(value)
+            period = int(read_first_line(os.path.join(cgroup_root, 'cpu', 'cpu.cfs_period_us')) or 100000)
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota / period)))
+    return cpus
+
+
+def read_memory(cgroup_root):
+    """ Return the memory limit in MiB. """
+    host = None
+    try:
+        with open('/proc/meminfo') as stream:
+            for line in stream:
+                if line.startswith('MemTotal:'):
+                    host = int(line.split()[1]) // 1024
+                    break
+    except OSError:
+        pass
+    limit = read_first_line(os.path.join(cgroup_root, 'memory.max'))
+    if limit is None:
+        limit = read_first_line(os.path.join(cgroup_root, 'memory', 'memory.limit_in_bytes'))
+    if limit and limit != 'max':
+        # cgroup v1 reports "unlimited" as a huge page aligned number
+        limit = int(limit) // MIB
+        if host is None or limit < host:
+            return limit
+    return host or 2048
+
+
+def read_max_connections(args):
+    if not args.db_host:
+        return None
+    try:
+        import psycopg2
+        conn = psycopg2.connect(user=args.db_user, host=args.db_host, port=args.db_port,
+                                password=args.db_password, dbname='postgres', connect_timeout=5)
+    except Exception as e:
+        log("Cannot read max_connections (%s), assuming %s" % (e, DEFAULT_MAX_CONNECTIONS))
+        return None
+    try:
+        with conn.cursor() as cr:
+            cr.execute("SELECT current_setting('max_connections')::int, "
+                       "current_setting('superuser_reserved_connections')::int")
+            return cr.fetchone()
+    finally:
+        conn.close()
+
+
+def log(message):
+    print("[autotune] %s" % message, flush=True)
+
+
+def pinned(option):
+    value = os.environ.get('ODOO_%s' % option.upper())
+    return int(value) if value else None
+
+
+def tune(cpus, memory, max_connections, superuser_reserved, reserve):
+    usable = int(memory * 0.8)
+    cron = pinned('max_cron_threads')
+    if cron is None:
+        cron = min(4, max(1, cpus // 4))
+    workers = pinned('workers')
+    if workers is None:
+        workers = max(1, min(2 * cpus + 1, usable // MIN_WORKER_MEMORY - cron))
+
+    budget = max_connections - superuser_reserved - reserve
+    db_maxconn = pinned('db_maxconn')
+    if db_maxconn is None:
+        if pinned('workers') is None and (workers + cron + 1) * MIN_DB_MAXCONN > budget:
+            fitting = max(1, budget // MIN_DB_MAXCONN - cron - 1)
+            log("max_connections=%s only fits %s workers instead of %s, raise it or add a pooler"
+                % (max_connections, fitting, workers))
+            workers = fitting
+        db_maxconn = max(MIN_DB_MAXCONN, min(MAX_DB_MAXCONN, budget // (workers + cron + 1)))
+
+    processes = workers + cron + 1
+    if processes * db_maxconn > budget:
+        log("WARNING: %s processes x db_maxconn %s = %s connections exceed the %s available on the server"
+            % (processes, db_maxconn, processes * db_maxconn, budget))
+
+    soft = pinned('limit_memory_soft')
+    if soft is None:
+        soft = int(min(MAX_MEMORY_SOFT, usable / (workers + cron)) * MIB)
+    hard = pinned('limit_memory_hard')
+    if hard is None:
+        hard = int(min(MAX_MEMORY_HARD * MIB, soft * 1.25))
+
+    return {
+        'workers': workers,
+        'max_cron_threads': cron,
+        'db_maxconn': db_maxconn,
+        'limit_memory_soft': soft,
+        'limit_memory_hard': hard,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive Odoo worker and pool settings from the container limits")
+    parser.add_argument('--config', default=os.environ.get('ODOO_RC', '/etc/odoo/odoo.conf'))
+    parser.add_argument('--output', default='/tmp/odoo-autotune.conf')
+    parser.add_argument('--cgroup-root', default='/sys/fs/cgroup')
+    parser.add_argument('--reserve', type=int, default=10, help="connections kept for other clients")
+    parser.add_argument('--db_host')
+    parser.add_argument('--db_port', default='5432')
+    parser.add_argument('--db_user')
+    parser.add_argument('--db_password')
+    args = parser.parse_args()
+
+    cpus = read_cpus(args.cgroup_root)
+    memory = read_memory(args.cgroup_root)
+    server = read_max_connections(args)
+    max_connections, superuser_reserved = server or (DEFAULT_MAX_CONNECTIONS, 3)
+    log("Detected %s CPUs, %s MiB memory, max_connections=%s" % (cpus, memory, max_connections))
+
+    values = tune(cpus, memory, max_connections, superuser_reserved, args.reserve)
+
+    config = configparser.RawConfigParser()
+    config.read(args.config)
+    if not config.has_section('options'):
+        config.add_section('options')
+    for option, value in values.items():
+        config.set('options', option, str(value))
+
+    tmp_path = '%s.%s.tmp' % (args.output, os.getpid())
+    with open(tmp_path, 'w') as stream:
+        stream.write("; generated by odoo-autotune.py from %s\n" % args.config)
+        config.write(stream)
+    os.replace(tmp_path, args.output)
+
+    log("Effective configuration %s:" % args.output)
+    for option, value in config.items('options'):
+        if option in SECRET_OPTIONS:
+            value = '********'
+        log("  %s = %s" % (option, value))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())